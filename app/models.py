@@ -281,12 +281,13 @@ class Question(db.Model):
         """복수 정답 문제 여부"""
         return self.q_type == self.TYPE_MULTIPLE_RESPONSE
     
-    def check_answer(self, user_answer):
+    def check_answer(self, user_answer, correct_numbers=None):
         """
         사용자 답안 채점
         
         Args:
             user_answer: 객관식이면 선택한 번호 리스트 [1, 2], 주관식이면 텍스트
+            correct_numbers: 이미 조회한 객관식 정답 번호 (없으면 선택지에서 조회)
         
         Returns:
             (is_correct: bool, correct_answer: 정답 정보)
@@ -302,7 +303,9 @@ class Question(db.Model):
             return user_text == correct_text, self.correct_answer_text
 
         # 객관식: 선택지 번호 비교
-        correct_numbers = set(self.correct_choice_numbers)
+        if correct_numbers is None:
+            correct_numbers = self.correct_choice_numbers
+        correct_numbers = set(correct_numbers)
 
         # user_answer를 set으로 변환
         if isinstance(user_answer, (list, tuple)):
@@ -323,7 +323,9 @@ def submit_answers(lecture_id):
             details={'questionIds': invalid_ids},
         )
 
-    summary, items = grade_practice_submission(lecture_id, answers_v1)
+    summary, items = grade_practice_submission(
+        lecture_id, answers_v1, questions=all_questions
+    )
     submitted_at = datetime.utcnow().replace(microsecond=0).isoformat() + 'Z'
 
     return jsonify(
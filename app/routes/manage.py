@@ -15,6 +15,7 @@ from werkzeug.utils import secure_filename
 from datetime import datetime
 import os
 import shutil
+from config import get_config
 from app import db
 from app.models import (
     Block,
@@ -591,7 +592,9 @@ def create_question(exam_id):
             if (
                 file
                 and file.filename
-                and allowed_file(file.filename, {"png", "jpg", "jpeg", "gif"})
+                and allowed_file(
+                    file.filename, get_config().runtime.allowed_extensions
+                )
             ):
                 filename = secure_filename(file.filename)
                 unique_filename = (
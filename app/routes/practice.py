@@ -9,8 +9,7 @@ from app.services.practice_service import (
     build_question_groups,
     build_duplicate_question_map,
     get_lecture_questions_ordered,
-    build_legacy_results,
-    evaluate_practice_answers,
+    evaluate_practice_answers_with_legacy,
     grade_practice_submission,
     normalize_practice_answers_payload,
 )
@@ -318,8 +317,9 @@ def submit(lecture_id):
     if error_code:
         return jsonify({'success': False, 'error': '?°ì´?°ê? ?†ìŠµ?ˆë‹¤.'}), 400
 
-    _summary, items, counts = evaluate_practice_answers(questions, answers_v1 or {})
-    results = build_legacy_results(questions, items, include_content=True)
+    _summary, _items, counts, results = evaluate_practice_answers_with_legacy(
+        questions, answers_v1 or {}, include_content=True
+    )
 
     if answers_v1 and not error_code:
         try:
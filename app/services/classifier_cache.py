@@ -5,7 +5,7 @@ import json
 from datetime import datetime
 from pathlib import Path
 from threading import Lock
-from typing import Dict, Optional
+from typing import Dict, Iterable, Optional
 
 
 def build_config_hash(config: Dict[str, object]) -> str:
@@ -13,7 +13,9 @@ def build_config_hash(config: Dict[str, object]) -> str:
     return hashlib.sha1(payload.encode("utf-8")).hexdigest()
 
 
-class ClassifierResultCache:
+class _JsonFileCache:
+    """Lazily loaded dict of cache entries persisted as one JSON file."""
+
     def __init__(self, path: str | Path):
         self.path = Path(path)
         self._lock = Lock()
@@ -30,14 +32,12 @@ class ClassifierResultCache:
                 self._data = {}
         self._loaded = True
 
-    def get(self, question_id: int, config_hash: str, model_name: str) -> Optional[Dict[str, object]]:
+    def _lookup(self, key: str) -> Optional[Dict[str, object]]:
         self._load()
-        key = f"{question_id}:{config_hash}:{model_name}"
         return self._data.get(key)
 
-    def set(self, question_id: int, config_hash: str, model_name: str, result: Dict[str, object]) -> None:
+    def _store(self, key: str, result: Dict[str, object]) -> None:
         self._load()
-        key = f"{question_id}:{config_hash}:{model_name}"
         with self._lock:
             self._data[key] = {
                 "result": result,
@@ -51,3 +51,47 @@ class ClassifierResultCache:
         with temp_path.open("w", encoding="utf-8") as handle:
             json.dump(self._data, handle, ensure_ascii=False, indent=2)
         temp_path.replace(self.path)
+
+
+class ClassifierResultCache(_JsonFileCache):
+    @staticmethod
+    def _key(question_id: int, config_hash: str, model_name: str) -> str:
+        return f"{question_id}:{config_hash}:{model_name}"
+
+    def get(self, question_id: int, config_hash: str, model_name: str) -> Optional[Dict[str, object]]:
+        return self._lookup(self._key(question_id, config_hash, model_name))
+
+    def get_many(
+        self, question_ids: Iterable[int], config_hash: str, model_name: str
+    ) -> Dict[int, Dict[str, object]]:
+        """Look up several questions at once; only hits are returned."""
+        self._load()
+        hits = {}
+        for question_id in question_ids:
+            entry = self._data.get(self._key(question_id, config_hash, model_name))
+            if entry is not None:
+                hits[question_id] = entry
+        return hits
+
+    def set(self, question_id: int, config_hash: str, model_name: str, result: Dict[str, object]) -> None:
+        self._store(self._key(question_id, config_hash, model_name), result)
+
+
+class RetrievalArtifactCache(_JsonFileCache):
+    """Disk cache of per-question retrieval results for evaluation sweeps.
+
+    Entries are keyed by question id, a hash of the question text and a
+    retrieval config hash, so edited questions or changed retrieval settings
+    miss instead of returning stale results.
+    """
+
+    @staticmethod
+    def _key(question_id: int, question_text: str, config_hash: str) -> str:
+        text_hash = hashlib.sha1(question_text.encode("utf-8")).hexdigest()
+        return f"{question_id}:{text_hash}:{config_hash}"
+
+    def get(self, question_id: int, question_text: str, config_hash: str) -> Optional[Dict[str, object]]:
+        return self._lookup(self._key(question_id, question_text, config_hash))
+
+    def set(self, question_id: int, question_text: str, config_hash: str, result: Dict[str, object]) -> None:
+        self._store(self._key(question_id, question_text, config_hash), result)
@@ -45,6 +45,22 @@ def _get_sentence_model(model_name: str):
         return model
 
 
+def enable_half_precision(model_name: str) -> bool:
+    """Cast the cached sentence-transformers model to fp16 if it runs on CUDA.
+
+    Opt-in for offline embedding builds. fp16 on CPU is slower than fp32, and
+    hashing models have no weights, so both are left alone. Returns True when
+    the cast was applied.
+    """
+    if _is_hashing_model(model_name):
+        return False
+    model = _get_sentence_model(model_name)
+    if model.device.type != "cuda":
+        return False
+    model.half()
+    return True
+
+
 def _prepare_texts(texts: List[str], model_name: str, is_query: bool) -> List[str]:
     if _is_e5_model(model_name):
         prefix = "query: " if is_query else "passage: "
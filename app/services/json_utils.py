@@ -0,0 +1,17 @@
+from __future__ import annotations
+
+import json
+
+try:
+    import orjson
+
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+
+def dumps_json(value) -> str:
+    """Serialize to compact UTF-8 JSON text, using orjson when installed."""
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(value).decode("utf-8")
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":"))
@@ -1,9 +1,9 @@
-import json
 import re
 from datetime import datetime
 
 from app import db
 from app.models import Lecture, PracticeAnswer, PracticeSession, Question
+from app.services.json_utils import dumps_json
 from app.services.transaction import transactional
 
 
@@ -87,6 +87,9 @@ def normalize_practice_answers_payload(payload, lecture_questions_meta):
     if payload is None or not isinstance(payload, dict):
         return None, False, "INVALID_PAYLOAD", "Invalid request payload."
 
+    # One hash lookup per answer: None means the id is not a known question.
+    question_is_short = (lecture_questions_meta or {}).get
+
     deprecated_input = False
     version = payload.get("version")
     if version is not None:
@@ -105,8 +108,9 @@ def normalize_practice_answers_payload(payload, lecture_questions_meta):
             value = item.get("value")
             if answer_type not in ("mcq", "short"):
                 return None, False, "INVALID_PAYLOAD", "Invalid answer type."
-            if lecture_questions_meta and key in lecture_questions_meta:
-                expected_type = "short" if lecture_questions_meta[key] else "mcq"
+            expected_short = question_is_short(key)
+            if expected_short is not None:
+                expected_type = "short" if expected_short else "mcq"
                 if answer_type != expected_type:
                     return None, False, "INVALID_PAYLOAD", "Answer type mismatch."
             if answer_type == "mcq":
@@ -130,8 +134,9 @@ def normalize_practice_answers_payload(payload, lecture_questions_meta):
     for key, value in answers_payload.items():
         if not _is_numeric_key(key):
             continue
-        if lecture_questions_meta and key in lecture_questions_meta:
-            answer_type = "short" if lecture_questions_meta[key] else "mcq"
+        expected_short = question_is_short(key)
+        if expected_short is not None:
+            answer_type = "short" if expected_short else "mcq"
         elif isinstance(value, dict) and value.get("type") in ("mcq", "short"):
             answer_type = value.get("type")
         elif isinstance(value, (list, int, float)):
@@ -160,31 +165,50 @@ def normalize_practice_answers_payload(payload, lecture_questions_meta):
 
 
 def evaluate_practice_answers(questions, answers_v1):
+    summary, items, counts, _results = _evaluate_practice_answers(
+        questions, answers_v1
+    )
+    return summary, items, counts
+
+
+def evaluate_practice_answers_with_legacy(
+    questions, answers_v1, include_content=False
+):
+    """Grade once and emit both the v1 items and the legacy results."""
+    return _evaluate_practice_answers(
+        questions,
+        answers_v1,
+        emit_legacy=True,
+        include_content=include_content,
+    )
+
+
+def _evaluate_practice_answers(
+    questions, answers_v1, emit_legacy=False, include_content=False
+):
     items = []
+    results = [] if emit_legacy else None
 
-    all_total = len(questions)
-    all_answered = 0
-    all_correct = 0
-    mcq_total = 0
+    # Per-type totals are known up front; the loop only tracks answered/correct.
+    short_flags = [question.is_short_answer for question in questions]
+    all_total = len(short_flags)
+    short_total = sum(short_flags)
+    mcq_total = all_total - short_total
     mcq_answered = 0
     mcq_correct = 0
-    short_total = 0
     short_answered = 0
     short_correct = 0
 
-    for question in questions:
+    for idx, (question, is_short) in enumerate(zip(questions, short_flags)):
         question_id = str(question.id)
-        is_short = question.is_short_answer
         answer_type = "short" if is_short else "mcq"
         answer_entry = answers_v1.get(question_id) if answers_v1 else None
-        can_auto_grade = (not is_short) or bool(question.correct_answer_text)
-        correct_answer = question.correct_choice_numbers if not is_short else None
-        correct_answer_text = question.correct_answer_text if is_short else None
-
-        if is_short:
-            short_total += 1
-        else:
-            mcq_total += 1
+        # Read each correct-answer field once; correct_choice_numbers queries choices.
+        correct_text = question.correct_answer_text
+        correct_choices = None if is_short else question.correct_choice_numbers
+        can_auto_grade = (not is_short) or bool(correct_text)
+        correct_answer = correct_choices
+        correct_answer_text = correct_text if is_short else None
 
         is_answered = False
         user_answer = None
@@ -203,23 +227,18 @@ def evaluate_practice_answers(questions, answers_v1):
                     user_answer = value
 
         if is_answered:
-            all_answered += 1
+            is_correct, correct_value = question.check_answer(
+                user_answer, correct_numbers=correct_choices
+            )
             if is_short:
                 short_answered += 1
-            else:
-                mcq_answered += 1
-
-            is_correct, correct_value = question.check_answer(user_answer)
-            if is_short:
                 correct_answer_text = correct_value
+                if is_correct:
+                    short_correct += 1
             else:
+                mcq_answered += 1
                 correct_answer = correct_value
-
-            if is_correct:
-                all_correct += 1
-                if is_short:
-                    short_correct += 1
-                else:
+                if is_correct:
                     mcq_correct += 1
 
         item = {
@@ -236,6 +255,23 @@ def evaluate_practice_answers(questions, answers_v1):
             item["correctAnswerText"] = correct_answer_text
         items.append(item)
 
+        if emit_legacy:
+            result = {
+                "seq": idx + 1,
+                "question_id": question.id,
+                "user_answer": user_answer,
+                "correct_answer": correct_answer_text if is_short else correct_answer,
+                "is_correct": is_correct,
+                "is_short_answer": is_short,
+                "can_auto_grade": can_auto_grade,
+            }
+            if include_content:
+                result["content"] = question.content[:100] if question.content else ""
+            results.append(result)
+
+    all_answered = mcq_answered + short_answered
+    all_correct = mcq_correct + short_correct
+
     summary = {
         "all": {"total": all_total, "answered": all_answered, "correct": all_correct},
         "mcq": {"total": mcq_total, "answered": mcq_answered, "correct": mcq_correct},
@@ -258,47 +294,7 @@ def evaluate_practice_answers(questions, answers_v1):
         "subjective_correct": short_correct,
     }
 
-    return summary, items, counts
-
-
-def build_legacy_results(questions, items, include_content=False):
-    item_map = {item["questionId"]: item for item in items}
-    results = []
-    for idx, question in enumerate(questions):
-        is_short = question.is_short_answer
-        item = item_map.get(question.id)
-        user_answer = item.get("userAnswer") if item else None
-        is_correct = item.get("isCorrect") if item else None
-        can_auto_grade = (
-            item.get("canAutoGrade")
-            if item
-            else (not is_short) or bool(question.correct_answer_text)
-        )
-
-        if is_short:
-            correct_answer = (
-                item.get("correctAnswerText") if item else question.correct_answer_text
-            )
-        else:
-            correct_answer = (
-                item.get("correctAnswer") if item else question.correct_choice_numbers
-            )
-            if correct_answer is None:
-                correct_answer = question.correct_choice_numbers
-
-        result = {
-            "seq": idx + 1,
-            "question_id": question.id,
-            "user_answer": user_answer,
-            "correct_answer": correct_answer,
-            "is_correct": is_correct,
-            "is_short_answer": is_short,
-            "can_auto_grade": can_auto_grade,
-        }
-        if include_content:
-            result["content"] = question.content[:100] if question.content else ""
-        results.append(result)
-    return results
+    return summary, items, counts, results
 
 
 @transactional
@@ -307,33 +303,36 @@ def grade_practice_submission(lecture_id, answers_v1, questions=None):
 
     if questions is None:
         questions = get_lecture_questions_ordered(lecture_id) or []
+    # Grade before the session joins db.session: grading reads choices, and an
+    # autoflush there would INSERT the session early and force a later UPDATE.
+    summary, items, _counts = evaluate_practice_answers(questions, answers_v1 or {})
+    finished_at = datetime.utcnow()
+
     # Each submit creates a new session; repeated submissions are kept for history.
     session = PracticeSession(
         lecture_id=lecture_id,
-        lecture_ids_json=json.dumps([lecture_id], ensure_ascii=True),
+        lecture_ids_json=dumps_json([lecture_id]),
         mode="practice",
-        question_order=json.dumps([q.id for q in questions], ensure_ascii=True),
+        question_order=dumps_json([q.id for q in questions]),
+        finished_at=finished_at,
     )
     db.session.add(session)
-    summary, items, _counts = evaluate_practice_answers(questions, answers_v1 or {})
 
     for item in items:
         if not item.get("isAnswered"):
             continue
-        answer_payload = json.dumps(
-            {"type": item.get("type"), "value": item.get("userAnswer")},
-            ensure_ascii=True,
+        answer_payload = dumps_json(
+            {"type": item.get("type"), "value": item.get("userAnswer")}
         )
         answer = PracticeAnswer(
             session=session,
             question_id=item.get("questionId"),
             answer_payload=answer_payload,
             is_correct=item.get("isCorrect"),
-            answered_at=datetime.utcnow(),
+            answered_at=finished_at,
         )
         db.session.add(answer)
 
-    session.finished_at = datetime.utcnow()
     return summary, items
 
 
@@ -370,44 +369,28 @@ def get_prev_next(ordered_questions, index):
 
 
 def build_question_groups(questions):
-    objective_questions = []
-    subjective_questions = []
-    question_map = []
     question_meta = []
-    objective_seq = 0
-    subjective_seq = 0
-
-    for idx, question in enumerate(questions):
-        question_map.append({"id": question.id, "number": question.question_number})
+    type_counts = {True: 0, False: 0}
 
+    for idx, question in enumerate(questions, start=1):
         is_short = question.is_short_answer
-        if is_short:
-            subjective_seq += 1
-            type_seq = subjective_seq
-        else:
-            objective_seq += 1
-            type_seq = objective_seq
-
-        meta = {
-            "id": question.id,
-            "number": question.question_number,
-            "original_seq": idx + 1,
-            "type_seq": type_seq,
-            "type": map_question_type(question),
-            "is_short_answer": is_short,
-            "is_multiple_response": question.is_multiple_response,
-        }
-
-        question_meta.append(meta)
-        if is_short:
-            subjective_questions.append(meta)
-        else:
-            objective_questions.append(meta)
+        type_counts[is_short] += 1
+        question_meta.append(
+            {
+                "id": question.id,
+                "number": question.question_number,
+                "original_seq": idx,
+                "type_seq": type_counts[is_short],
+                "type": map_question_type(question),
+                "is_short_answer": is_short,
+                "is_multiple_response": question.is_multiple_response,
+            }
+        )
 
     return {
-        "objective_questions": objective_questions,
-        "subjective_questions": subjective_questions,
-        "question_map": question_map,
+        "objective_questions": [m for m in question_meta if not m["is_short_answer"]],
+        "subjective_questions": [m for m in question_meta if m["is_short_answer"]],
+        "question_map": [{"id": m["id"], "number": m["number"]} for m in question_meta],
         "question_meta": question_meta,
     }
 
@@ -456,7 +439,8 @@ def grade_questions(questions, answers, include_content=False):
     if error_code or answers_v1 is None:
         answers_v1 = {}
 
-    _summary, items, counts = evaluate_practice_answers(questions, answers_v1)
-    results = build_legacy_results(questions, items, include_content=include_content)
+    _summary, _items, counts, results = evaluate_practice_answers_with_legacy(
+        questions, answers_v1, include_content=include_content
+    )
 
     return counts, results
@@ -16,6 +16,7 @@ from tenacity import (
 
 from app import db
 from app.models import QuestionQuery
+from app.services.json_utils import dumps_json
 
 try:
     from google import genai
@@ -53,9 +54,12 @@ PROMPT_TEMPLATE = """역할: 너는 의학 강의록 검색을 돕는 “검색
 """
 
 
-SECTION_PATTERN = re.compile(
-    r"\[KEYWORDS\](.*?)\[LECTURE_STYLE_QUERY\](.*?)\[NEGATIVE_KEYWORDS\](.*)",
-    re.DOTALL | re.IGNORECASE,
+# Section headers in output order. Each is located with a single forward scan
+# from the end of the previous one, so malformed output cannot trigger the
+# nested lazy-group backtracking of a combined pattern.
+SECTION_MARKERS = tuple(
+    re.compile(re.escape(marker), re.IGNORECASE)
+    for marker in ("[KEYWORDS]", "[LECTURE_STYLE_QUERY]", "[NEGATIVE_KEYWORDS]")
 )
 
 
@@ -86,11 +90,28 @@ def _parse_bullets(section: str) -> List[str]:
     return _normalize_list(lines)
 
 
+def _split_sections(text: str) -> Optional[tuple[str, str, str]]:
+    matches = []
+    pos = 0
+    for marker in SECTION_MARKERS:
+        match = marker.search(text, pos)
+        if not match:
+            return None
+        matches.append(match)
+        pos = match.end()
+    keywords, lecture, negative = matches
+    return (
+        text[keywords.end() : lecture.start()],
+        text[lecture.end() : negative.start()],
+        text[negative.end() :],
+    )
+
+
 def parse_transformation(text: str) -> Optional[QueryTransformation]:
-    match = SECTION_PATTERN.search(text or "")
-    if not match:
+    sections = _split_sections(text or "")
+    if not sections:
         return None
-    keywords_raw, lecture_raw, negative_raw = match.groups()
+    keywords_raw, lecture_raw, negative_raw = sections
 
     keywords = _parse_bullets(keywords_raw)
     negative_keywords = _parse_bullets(negative_raw)
@@ -222,10 +243,8 @@ def get_query_payload(
         question_id=question_id,
         prompt_version=prompt_version,
         lecture_style_query=generated.lecture_style_query,
-        keywords_json=json.dumps(generated.keywords, ensure_ascii=False),
-        negative_keywords_json=json.dumps(
-            generated.negative_keywords, ensure_ascii=False
-        ),
+        keywords_json=dumps_json(generated.keywords),
+        negative_keywords_json=dumps_json(generated.negative_keywords),
     )
     try:
         db.session.add(row)
@@ -3,9 +3,15 @@ from __future__ import annotations
 from dataclasses import dataclass
 from typing import Dict, List, Optional
 
-from app.models import LectureChunk
+from sqlalchemy import text
+
+from app import db
 from app.services import retrieval
 
+_CHUNK_LENGTH_SQL = text(
+    "SELECT COALESCE(char_len, length(content), 0) FROM lecture_chunks WHERE id = :chunk_id"
+)
+
 
 @dataclass
 class RetrievalArtifacts:
@@ -46,12 +52,10 @@ def _top1_pair(chunks: List[Dict]) -> tuple[Optional[int], Optional[int]]:
 def _chunk_length(chunk_id: Optional[int]) -> Optional[int]:
     if chunk_id is None:
         return None
-    chunk = LectureChunk.query.get(chunk_id)
-    if not chunk:
-        return None
-    if chunk.char_len is not None:
-        return int(chunk.char_len)
-    return len(chunk.content or "")
+    length = db.session.execute(
+        _CHUNK_LENGTH_SQL, {"chunk_id": chunk_id}
+    ).scalar()
+    return int(length) if length is not None else None
 
 
 def build_retrieval_artifacts(
@@ -61,21 +65,27 @@ def build_retrieval_artifacts(
     top_n: int = 80,
     top_k: int = 5,
 ) -> RetrievalArtifacts:
-    bm25_chunks = retrieval.search_chunks_bm25(
+    # One BM25 query (with its embeddings) serves all three rankings: the
+    # BM25 top_n is a prefix of the hybrid's larger BM25 pool.
+    bm25_pool, candidate_embeddings = retrieval.search_chunks_bm25_with_embeddings(
         question_text,
-        top_n=top_n,
+        top_n=retrieval.hybrid_bm25_top_n(top_n),
         question_id=question_id,
     )
+    bm25_chunks = bm25_pool[:top_n]
     embed_chunks = retrieval.search_chunks_embedding(
         question_text,
         top_n=top_n,
         candidate_chunks=bm25_chunks,
         question_id=question_id,
+        candidate_embeddings=candidate_embeddings,
     )
     hybrid_chunks = retrieval.search_chunks_hybrid_rrf(
         question_text,
         top_n=top_n,
         question_id=question_id,
+        bm25_chunks=bm25_pool,
+        candidate_embeddings=candidate_embeddings,
     )
 
     bm25_topk = _ranked_list(bm25_chunks, "bm25_score", top_k)
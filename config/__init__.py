@@ -3,19 +3,26 @@
 Provides a centralized `get_config()` function that returns an AppConfig singleton.
 """
 
-import threading
+import functools
 
 from .base import DEFAULT_SECRET_KEY
+from . import experiment as _experiment
+from . import runtime as _runtime
 from .runtime import get_runtime_config
 from .experiment import get_experiment_config
 from .schema import AppConfig, RuntimeConfig, ExperimentConfig
+from .legacy import Config
 
-# Singleton cache
-_config_cache = None
-_config_lock = threading.Lock()
 _config_name = "default"  # Flask profile name
 
 
+def _clear_caches() -> None:
+    """Drop every memoized config object so the next lookup rebuilds it."""
+    _build_config.cache_clear()
+    get_runtime_config.cache_clear()
+    get_experiment_config.cache_clear()
+
+
 def set_config_name(name: str) -> None:
     """
     Set the Flask config profile name.
@@ -23,40 +30,50 @@ def set_config_name(name: str) -> None:
     This must be called before `get_config()` if using a non-default profile.
     """
     global _config_name
-    with _config_lock:
-        _config_name = name
-        _config_cache = None  # Invalidate cache
+    _config_name = name
+    _clear_caches()
+
+
+def refresh_env_cache() -> None:
+    """
+    Re-snapshot os.environ and drop the cached AppConfig.
+
+    Config modules read a snapshot of the environment taken at import; call this
+    after mutating os.environ (e.g. in tests) so the next `get_config()` sees it.
+    """
+    _runtime.refresh_env_cache()
+    _experiment.refresh_env_cache()
+    _clear_caches()
+
+
+@functools.lru_cache(maxsize=None)
+def _build_config(name: str) -> AppConfig:
+    return AppConfig(
+        runtime=get_runtime_config(flask_config_name=name),
+        experiment=get_experiment_config(),
+        secret_key=DEFAULT_SECRET_KEY,
+    )
 
 
 def get_config() -> AppConfig:
     """
     Get the application configuration (singleton).
 
+    The environment is fixed for the life of the process, so the AppConfig is
+    built once per profile and later calls are a single lru_cache hit.
+
     Returns:
         AppConfig instance with runtime and experiment settings
     """
-    global _config_cache
-
-    if _config_cache is not None:
-        return _config_cache
-
-    with _config_lock:
-        if _config_cache is None:
-            runtime = get_runtime_config(flask_config_name=_config_name)
-            experiment = get_experiment_config()
-            _config_cache = AppConfig(
-                runtime=runtime,
-                experiment=experiment,
-                secret_key=DEFAULT_SECRET_KEY,
-            )
-
-    return _config_cache
+    return _build_config(_config_name)
 
 
 __all__ = [
     "get_config",
     "set_config_name",
+    "refresh_env_cache",
     "RuntimeConfig",
     "ExperimentConfig",
     "AppConfig",
+    "Config",
 ]
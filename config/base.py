@@ -14,7 +14,11 @@ DEFAULT_SECRET_KEY = "dev-secret-key-change-in-production"
 
 def _sqlite_uri(path: Path) -> str:
     """Convert a Path to SQLite URI."""
-    return f"sqlite:///{path.resolve().as_posix()}"
+    # resolve() costs a realpath() walk; clean absolute paths (the defaults
+    # below, most DB_PATH overrides) are already usable as-is.
+    if not path.is_absolute() or ".." in path.parts:
+        path = path.resolve()
+    return f"sqlite:///{path.as_posix()}"
 
 
 # Default database paths
@@ -31,6 +35,7 @@ DEFAULT_CLASSIFIER_CACHE_PATH = BASE_DIR / "data" / "classifier_cache.json"
 
 # Default values for common settings
 DEFAULT_MAX_CONTENT_LENGTH = 100 * 1024 * 1024  # 100MB
+DEFAULT_ALLOWED_EXTENSIONS = frozenset(("png", "jpg", "jpeg", "gif"))
 DEFAULT_AUTO_BACKUP_KEEP = 30
 DEFAULT_AUTO_CREATE_DB = False
 
@@ -41,9 +46,12 @@ DEFAULT_GEMINI_MAX_OUTPUT_TOKENS = 2048
 # Experiment defaults
 DEFAULT_RETRIEVAL_MODE = "hybrid_rrf"
 DEFAULT_RRF_K = 60
+DEFAULT_BM25_MAX_DF_RATIO = 0.0
 DEFAULT_EMBEDDING_MODEL_NAME = "intfloat/multilingual-e5-base"
 DEFAULT_EMBEDDING_DIM = 768
 DEFAULT_EMBEDDING_TOP_N = 300
+DEFAULT_EMBEDDING_INDEX_DTYPE = "float32"
+DEFAULT_EMBEDDING_ANN_BACKEND = "exact"
 
 # HYDE defaults
 DEFAULT_HYDE_ENABLED = False
@@ -94,15 +102,19 @@ __all__ = [
     "DEFAULT_REPORTS_DIR",
     "DEFAULT_CLASSIFIER_CACHE_PATH",
     "DEFAULT_MAX_CONTENT_LENGTH",
+    "DEFAULT_ALLOWED_EXTENSIONS",
     "DEFAULT_AUTO_BACKUP_KEEP",
     "DEFAULT_AUTO_CREATE_DB",
     "DEFAULT_GEMINI_MODEL_NAME",
     "DEFAULT_GEMINI_MAX_OUTPUT_TOKENS",
     "DEFAULT_RETRIEVAL_MODE",
     "DEFAULT_RRF_K",
+    "DEFAULT_BM25_MAX_DF_RATIO",
     "DEFAULT_EMBEDDING_MODEL_NAME",
     "DEFAULT_EMBEDDING_DIM",
     "DEFAULT_EMBEDDING_TOP_N",
+    "DEFAULT_EMBEDDING_INDEX_DTYPE",
+    "DEFAULT_EMBEDDING_ANN_BACKEND",
     "DEFAULT_HYDE_ENABLED",
     "DEFAULT_HYDE_AUTO_GENERATE",
     "DEFAULT_HYDE_PROMPT_VERSION",
@@ -3,14 +3,19 @@
 Reads experiment-related environment variables with clear namespacing.
 """
 
+import functools
 import os
+import sys
 
 from .base import (
     DEFAULT_RETRIEVAL_MODE,
     DEFAULT_RRF_K,
+    DEFAULT_BM25_MAX_DF_RATIO,
     DEFAULT_EMBEDDING_MODEL_NAME,
     DEFAULT_EMBEDDING_DIM,
     DEFAULT_EMBEDDING_TOP_N,
+    DEFAULT_EMBEDDING_INDEX_DTYPE,
+    DEFAULT_EMBEDDING_ANN_BACKEND,
     DEFAULT_HYDE_ENABLED,
     DEFAULT_HYDE_AUTO_GENERATE,
     DEFAULT_HYDE_PROMPT_VERSION,
@@ -40,17 +45,43 @@ from .base import (
 from .schema import ExperimentConfig
 
 
+# Environment snapshot taken at import; env vars do not change after process
+# start, so every helper below reads this plain dict instead of os.environ.
+_ENV = dict(os.environ)
+_TRUTHY = frozenset(("1", "true", "yes", "on"))
+
+
+def refresh_env_cache() -> None:
+    """Re-read os.environ into the module snapshot (tests, late dotenv loads)."""
+    _ENV.clear()
+    _ENV.update(os.environ)
+
+
+def _env_str(name, default=None):
+    """Read a string environment variable."""
+    return _ENV.get(name, default)
+
+
+def _env_choice(name, default):
+    """Read a closed-vocabulary string (mode/strategy names), interned.
+
+    Downstream code compares these with ``==`` per request; interning lets the
+    comparison hit CPython's identity fast path against the string literals.
+    """
+    return sys.intern(_ENV.get(name, default))
+
+
 def _env_flag(name, default=False):
     """Read a boolean environment variable."""
-    value = os.environ.get(name)
+    value = _ENV.get(name)
     if value is None:
         return default
-    return value.lower() in ("1", "true", "yes", "on")
+    return value.lower() in _TRUTHY
 
 
 def _env_float(name, default):
     """Read a float environment variable."""
-    value = os.environ.get(name)
+    value = _ENV.get(name)
     if value is None:
         return default
     try:
@@ -61,7 +92,7 @@ def _env_float(name, default):
 
 def _env_int(name, default):
     """Read an integer environment variable."""
-    value = os.environ.get(name)
+    value = _ENV.get(name)
     if value is None:
         return default
     try:
@@ -70,10 +101,13 @@ def _env_int(name, default):
         return default
 
 
+@functools.lru_cache(maxsize=1)
 def get_experiment_config() -> ExperimentConfig:
     """
     Build experiment configuration from environment variables.
 
+    Memoized; call `config.refresh_env_cache()` to rebuild after env changes.
+
     Returns:
         ExperimentConfig instance
     """
@@ -116,26 +150,35 @@ def get_experiment_config() -> ExperimentConfig:
             "SEMANTIC_EXPANSION_QUERY_MAX_CHARS",
             default=DEFAULT_SEMANTIC_EXPANSION_QUERY_MAX_CHARS,
         ),
-        retrieval_mode=os.environ.get("RETRIEVAL_MODE", DEFAULT_RETRIEVAL_MODE),
+        retrieval_mode=_env_choice("RETRIEVAL_MODE", DEFAULT_RETRIEVAL_MODE),
         rrf_k=_env_int("RRF_K", default=DEFAULT_RRF_K),
-        embedding_model_name=os.environ.get(
+        bm25_max_df_ratio=_env_float(
+            "BM25_MAX_DF_RATIO", default=DEFAULT_BM25_MAX_DF_RATIO
+        ),
+        embedding_model_name=_env_str(
             "EMBEDDING_MODEL_NAME", DEFAULT_EMBEDDING_MODEL_NAME
         ),
         embedding_dim=_env_int("EMBEDDING_DIM", default=DEFAULT_EMBEDDING_DIM),
         embedding_top_n=_env_int("EMBEDDING_TOP_N", default=DEFAULT_EMBEDDING_TOP_N),
+        embedding_index_dtype=_env_choice(
+            "EMBEDDING_INDEX_DTYPE", DEFAULT_EMBEDDING_INDEX_DTYPE
+        ),
+        embedding_ann_backend=_env_choice(
+            "EMBEDDING_ANN_BACKEND", DEFAULT_EMBEDDING_ANN_BACKEND
+        ),
         hyde_enabled=_env_flag("HYDE_ENABLED", default=DEFAULT_HYDE_ENABLED),
         hyde_auto_generate=_env_flag(
             "HYDE_AUTO_GENERATE", default=DEFAULT_HYDE_AUTO_GENERATE
         ),
-        hyde_prompt_version=os.environ.get(
+        hyde_prompt_version=_env_str(
             "HYDE_PROMPT_VERSION", DEFAULT_HYDE_PROMPT_VERSION
         ),
-        hyde_model_name=os.environ.get("HYDE_MODEL_NAME"),
-        hyde_strategy=os.environ.get("HYDE_STRATEGY", DEFAULT_HYDE_STRATEGY),
-        hyde_bm25_variant=os.environ.get(
+        hyde_model_name=_env_str("HYDE_MODEL_NAME"),
+        hyde_strategy=_env_choice("HYDE_STRATEGY", DEFAULT_HYDE_STRATEGY),
+        hyde_bm25_variant=_env_choice(
             "HYDE_BM25_VARIANT", DEFAULT_HYDE_BM25_VARIANT
         ),
-        hyde_negative_mode=os.environ.get(
+        hyde_negative_mode=_env_choice(
             "HYDE_NEGATIVE_MODE", DEFAULT_HYDE_NEGATIVE_MODE
         ),
         hyde_margin_eps=_env_float("HYDE_MARGIN_EPS", default=DEFAULT_HYDE_MARGIN_EPS),
@@ -151,8 +194,14 @@ def get_experiment_config() -> ExperimentConfig:
         hyde_embed_weight_orig=_env_float(
             "HYDE_EMBED_WEIGHT_ORIG", default=DEFAULT_HYDE_EMBED_WEIGHT_ORIG
         ),
-        pdf_parser_mode=os.environ.get("PDF_PARSER_MODE", DEFAULT_PDF_PARSER_MODE),
+        pdf_parser_mode=_env_choice("PDF_PARSER_MODE", DEFAULT_PDF_PARSER_MODE),
     )
 
 
-__all__ = ["get_experiment_config", "_env_flag", "_env_float", "_env_int"]
+__all__ = [
+    "get_experiment_config",
+    "refresh_env_cache",
+    "_env_flag",
+    "_env_float",
+    "_env_int",
+]
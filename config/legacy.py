@@ -0,0 +1,167 @@
+"""Legacy Flask-style `Config` classes (backward compatibility shim).
+
+Attributes are resolved from `get_config()` on first access and memoized on the
+class, so importing this module does not build or copy the whole configuration.
+
+TODO(deprecate): Migrate imports to use `from config import get_config`
+"""
+
+from .base import BASE_DIR
+
+# Legacy attribute -> (AppConfig section or None for top level, field, to_str)
+_LAZY_MAP = {
+    # Core Settings
+    "SECRET_KEY": (None, "secret_key", False),
+    # Database Operations
+    "SQLALCHEMY_DATABASE_URI": ("runtime", "db_uri", True),
+    "AUTO_BACKUP_BEFORE_WRITE": ("runtime", "auto_backup_before_write", False),
+    "AUTO_BACKUP_KEEP": ("runtime", "auto_backup_keep", False),
+    "AUTO_BACKUP_DIR": ("runtime", "auto_backup_dir", True),
+    "ENFORCE_BACKUP_BEFORE_WRITE": ("runtime", "enforce_backup_before_write", False),
+    "DB_READ_ONLY": ("runtime", "db_read_only", False),
+    "CHECK_PENDING_MIGRATIONS": ("runtime", "check_pending_migrations", False),
+    "FAIL_ON_PENDING_MIGRATIONS": ("runtime", "fail_on_pending_migrations", False),
+    "AUTO_CREATE_DB": ("runtime", "auto_create_db", False),
+    # File Handling
+    "UPLOAD_FOLDER": ("runtime", "upload_folder", False),
+    "MAX_CONTENT_LENGTH": ("runtime", "max_content_length", False),
+    "ALLOWED_EXTENSIONS": ("runtime", "allowed_extensions", False),
+    # AI Classification (Gemini)
+    "GEMINI_API_KEY": ("runtime", "gemini_api_key", False),
+    "GEMINI_MODEL_NAME": ("runtime", "gemini_model_name", False),
+    "GEMINI_MAX_OUTPUT_TOKENS": ("runtime", "gemini_max_output_tokens", False),
+    # Classifier Cache
+    "CLASSIFIER_CACHE_PATH": ("runtime", "classifier_cache_path", True),
+    # Auto-Confirm V2 (Classifier Enhancement)
+    "AUTO_CONFIRM_V2_ENABLED": ("experiment", "auto_confirm_v2_enabled", False),
+    "AUTO_CONFIRM_V2_DELTA": ("experiment", "auto_confirm_v2_delta", False),
+    "AUTO_CONFIRM_V2_MAX_BM25_RANK": (
+        "experiment",
+        "auto_confirm_v2_max_bm25_rank",
+        False,
+    ),
+    "AUTO_CONFIRM_V2_DELTA_UNCERTAIN": (
+        "experiment",
+        "auto_confirm_v2_delta_uncertain",
+        False,
+    ),
+    "AUTO_CONFIRM_V2_MIN_CHUNK_LEN": (
+        "experiment",
+        "auto_confirm_v2_min_chunk_len",
+        False,
+    ),
+    # Context Expansion
+    "PARENT_ENABLED": ("experiment", "parent_enabled", False),
+    "PARENT_WINDOW_PAGES": ("experiment", "parent_window_pages", False),
+    "PARENT_MAX_CHARS": ("experiment", "parent_max_chars", False),
+    "PARENT_TOPK": ("experiment", "parent_topk", False),
+    "SEMANTIC_EXPANSION_ENABLED": ("experiment", "semantic_expansion_enabled", False),
+    "SEMANTIC_EXPANSION_TOP_N": ("experiment", "semantic_expansion_top_n", False),
+    "SEMANTIC_EXPANSION_MAX_EXTRA": (
+        "experiment",
+        "semantic_expansion_max_extra",
+        False,
+    ),
+    "SEMANTIC_EXPANSION_QUERY_MAX_CHARS": (
+        "experiment",
+        "semantic_expansion_query_max_chars",
+        False,
+    ),
+    # Retrieval & Search
+    "RETRIEVAL_MODE": ("experiment", "retrieval_mode", False),
+    "RRF_K": ("experiment", "rrf_k", False),
+    "EMBEDDING_MODEL_NAME": ("experiment", "embedding_model_name", False),
+    "EMBEDDING_DIM": ("experiment", "embedding_dim", False),
+    "EMBEDDING_TOP_N": ("experiment", "embedding_top_n", False),
+    "HYDE_ENABLED": ("experiment", "hyde_enabled", False),
+    "HYDE_AUTO_GENERATE": ("experiment", "hyde_auto_generate", False),
+    "HYDE_PROMPT_VERSION": ("experiment", "hyde_prompt_version", False),
+    "HYDE_MODEL_NAME": ("experiment", "hyde_model_name", False),
+    "HYDE_STRATEGY": ("experiment", "hyde_strategy", False),
+    "HYDE_BM25_VARIANT": ("experiment", "hyde_bm25_variant", False),
+    "HYDE_NEGATIVE_MODE": ("experiment", "hyde_negative_mode", False),
+    "HYDE_MARGIN_EPS": ("experiment", "hyde_margin_eps", False),
+    "HYDE_MAX_KEYWORDS": ("experiment", "hyde_max_keywords", False),
+    "HYDE_MAX_NEGATIVE": ("experiment", "hyde_max_negative", False),
+    "HYDE_EMBED_WEIGHT": ("experiment", "hyde_embed_weight", False),
+    "HYDE_EMBED_WEIGHT_ORIG": ("experiment", "hyde_embed_weight_orig", False),
+    # PDF Processing
+    "PDF_PARSER_MODE": ("experiment", "pdf_parser_mode", False),
+    # Admin & Security
+    "LOCAL_ADMIN_ONLY": ("runtime", "local_admin_only", False),
+    # Cache & Artifacts
+    "DATA_CACHE_DIR": ("runtime", "data_cache_dir", True),
+    "REPORTS_DIR": ("runtime", "reports_dir", True),
+}
+
+
+class _LazyConfigMeta(type):
+    """Resolve legacy attributes from `get_config()` on first access."""
+
+    def __getattr__(cls, name):
+        try:
+            section, attr, to_str = _LAZY_MAP[name]
+        except KeyError:
+            raise AttributeError(name) from None
+
+        from . import get_config
+
+        source = get_config()
+        if section is not None:
+            source = getattr(source, section)
+        value = getattr(source, attr)
+        if to_str:
+            value = str(value)
+        setattr(cls, name, value)
+        return value
+
+    def __dir__(cls):
+        return sorted(set(super().__dir__()) | _LAZY_MAP.keys())
+
+
+class Config(metaclass=_LazyConfigMeta):
+    """기본 설정 클래스 (backward compatibility shim)"""
+
+    __slots__ = ()
+
+    SQLALCHEMY_TRACK_MODIFICATIONS = False
+
+
+class DevelopmentConfig(Config):
+    """개발 환경 설정 (backward compatibility shim)"""
+
+    __slots__ = ()
+
+    DEBUG = True
+
+
+class ProductionConfig(Config):
+    """프로덕션 환경 설정 (backward compatibility shim)"""
+
+    __slots__ = ()
+
+    DEBUG = False
+
+
+class LocalAdminConfig(Config):
+    """Local-only admin sandbox configuration (backward compatibility shim)"""
+
+    __slots__ = ()
+
+
+# 설정 매핑 (backward compatibility shim)
+config = {
+    "development": DevelopmentConfig,
+    "production": ProductionConfig,
+    "local_admin": LocalAdminConfig,
+    "default": DevelopmentConfig,
+}
+
+__all__ = [
+    "BASE_DIR",
+    "Config",
+    "DevelopmentConfig",
+    "ProductionConfig",
+    "LocalAdminConfig",
+    "config",
+]
@@ -3,10 +3,12 @@
 Reads environment variables and applies defaults for production runtime.
 """
 
+import functools
 import os
 from pathlib import Path
 
 from .base import (
+    _sqlite_uri,
     DEFAULT_SECRET_KEY,
     DEFAULT_DB_URI,
     LOCAL_ADMIN_DB_URI,
@@ -17,6 +19,7 @@ from .base import (
     DEFAULT_REPORTS_DIR,
     DEFAULT_CLASSIFIER_CACHE_PATH,
     DEFAULT_MAX_CONTENT_LENGTH,
+    DEFAULT_ALLOWED_EXTENSIONS,
     DEFAULT_AUTO_BACKUP_KEEP,
     DEFAULT_AUTO_CREATE_DB,
     DEFAULT_GEMINI_MODEL_NAME,
@@ -27,17 +30,34 @@ from .base import (
 from .schema import RuntimeConfig
 
 
+# Environment snapshot taken at import; env vars do not change after process
+# start, so every helper below reads this plain dict instead of os.environ.
+_ENV = dict(os.environ)
+_TRUTHY = frozenset(("1", "true", "yes", "on"))
+
+
+def refresh_env_cache() -> None:
+    """Re-read os.environ into the module snapshot (tests, late dotenv loads)."""
+    _ENV.clear()
+    _ENV.update(os.environ)
+
+
+def _env_str(name, default=None):
+    """Read a string environment variable."""
+    return _ENV.get(name, default)
+
+
 def _env_flag(name, default=False):
     """Read a boolean environment variable."""
-    value = os.environ.get(name)
+    value = _ENV.get(name)
     if value is None:
         return default
-    return value.lower() in ("1", "true", "yes", "on")
+    return value.lower() in _TRUTHY
 
 
 def _env_int(name, default):
     """Read an integer environment variable."""
-    value = os.environ.get(name)
+    value = _ENV.get(name)
     if value is None:
         return default
     try:
@@ -46,10 +66,13 @@ def _env_int(name, default):
         return default
 
 
+@functools.lru_cache(maxsize=None)
 def get_runtime_config(flask_config_name="default") -> RuntimeConfig:
     """
     Build runtime configuration from environment variables.
 
+    Memoized per profile; call `config.refresh_env_cache()` to rebuild.
+
     Args:
         flask_config_name: Flask config profile name (default/production/local_admin)
                           Used to select appropriate DB path.
@@ -59,12 +82,12 @@ def get_runtime_config(flask_config_name="default") -> RuntimeConfig:
     """
     # Database selection based on Flask profile
     if flask_config_name == "local_admin":
-        db_env = os.environ.get("LOCAL_ADMIN_DB")
+        db_env = _env_str("LOCAL_ADMIN_DB")
         db_uri = f"sqlite:///{db_env}" if db_env else LOCAL_ADMIN_DB_URI
         upload_folder = DEFAULT_LOCAL_ADMIN_UPLOAD_FOLDER
         local_admin_only = True
     else:
-        db_env = os.environ.get("DB_PATH")  # Optional explicit override
+        db_env = _env_str("DB_PATH")  # Optional explicit override
         db_uri = _sqlite_uri(Path(db_env)) if db_env else DEFAULT_DB_URI
         upload_folder = DEFAULT_UPLOAD_FOLDER
         local_admin_only = _env_flag("LOCAL_ADMIN_ONLY", default=False)
@@ -75,7 +98,7 @@ def get_runtime_config(flask_config_name="default") -> RuntimeConfig:
         auto_backup_before_write=_env_flag("AUTO_BACKUP_BEFORE_WRITE", default=False),
         auto_backup_keep=_env_int("AUTO_BACKUP_KEEP", default=DEFAULT_AUTO_BACKUP_KEEP),
         auto_backup_dir=Path(
-            os.environ.get("AUTO_BACKUP_DIR", str(DEFAULT_BACKUP_DIR))
+            _env_str("AUTO_BACKUP_DIR", str(DEFAULT_BACKUP_DIR))
         ),
         enforce_backup_before_write=_env_flag(
             "ENFORCE_BACKUP_BEFORE_WRITE", default=False
@@ -85,31 +108,26 @@ def get_runtime_config(flask_config_name="default") -> RuntimeConfig:
             "FAIL_ON_PENDING_MIGRATIONS", default=False
         ),
         auto_create_db=_env_flag("AUTO_CREATE_DB", default=DEFAULT_AUTO_CREATE_DB),
-        upload_folder=Path(os.environ.get("UPLOAD_FOLDER", str(DEFAULT_UPLOAD_FOLDER))),
+        upload_folder=Path(_env_str("UPLOAD_FOLDER", str(DEFAULT_UPLOAD_FOLDER))),
         max_content_length=DEFAULT_MAX_CONTENT_LENGTH,
-        allowed_extensions={"png", "jpg", "jpeg", "gif"},
-        gemini_api_key=os.environ.get("GEMINI_API_KEY"),
-        gemini_model_name=os.environ.get(
+        allowed_extensions=DEFAULT_ALLOWED_EXTENSIONS,
+        gemini_api_key=_env_str("GEMINI_API_KEY"),
+        gemini_model_name=_env_str(
             "GEMINI_MODEL_NAME", DEFAULT_GEMINI_MODEL_NAME
         ),
         gemini_max_output_tokens=_env_int(
             "GEMINI_MAX_OUTPUT_TOKENS", default=DEFAULT_GEMINI_MAX_OUTPUT_TOKENS
         ),
         classifier_cache_path=Path(
-            os.environ.get("CLASSIFIER_CACHE_PATH", str(DEFAULT_CLASSIFIER_CACHE_PATH))
+            _env_str("CLASSIFIER_CACHE_PATH", str(DEFAULT_CLASSIFIER_CACHE_PATH))
         ),
-        data_cache_dir=Path(os.environ.get("DATA_CACHE_DIR", str(DEFAULT_CACHE_DIR))),
-        reports_dir=Path(os.environ.get("REPORTS_DIR", str(DEFAULT_REPORTS_DIR))),
+        data_cache_dir=Path(_env_str("DATA_CACHE_DIR", str(DEFAULT_CACHE_DIR))),
+        reports_dir=Path(_env_str("REPORTS_DIR", str(DEFAULT_REPORTS_DIR))),
         local_admin_only=_env_flag("LOCAL_ADMIN_ONLY", default=False),
-        cors_allowed_origins=os.environ.get(
+        cors_allowed_origins=_env_str(
             "CORS_ALLOWED_ORIGINS", DEFAULT_CORS_ALLOWED_ORIGINS
         ),
     )
 
 
-def _sqlite_uri(path: Path) -> str:
-    """Convert a Path to SQLite URI."""
-    return f"sqlite:///{path.resolve().as_posix()}"
-
-
-__all__ = ["get_runtime_config", "_env_flag", "_env_int"]
+__all__ = ["get_runtime_config", "refresh_env_cache", "_env_flag", "_env_int"]
@@ -1,6 +1,8 @@
 """Configuration schema dataclasses.
 
-Minimal dataclasses for runtime and experiment configuration.
+Minimal dataclasses for runtime and experiment configuration. Instances are
+built once per process (see `config.get_config()`), so they are frozen and
+slotted: shared safely across requests and hashable.
 """
 
 from dataclasses import dataclass, field
@@ -8,7 +10,7 @@ from pathlib import Path
 from typing import Optional
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class RuntimeConfig:
     """Runtime configuration - environment-driven settings."""
 
@@ -30,9 +32,7 @@ class RuntimeConfig:
     # File handling
     upload_folder: Path = field(default_factory=lambda: Path("app/static/uploads"))
     max_content_length: int = 100 * 1024 * 1024  # 100MB
-    allowed_extensions: set = field(
-        default_factory=lambda: {"png", "jpg", "jpeg", "gif"}
-    )
+    allowed_extensions: frozenset = frozenset({"png", "jpg", "jpeg", "gif"})
 
     # AI/Gemini
     gemini_api_key: Optional[str] = None
@@ -61,10 +61,10 @@ class RuntimeConfig:
         if self.max_content_length <= 0:
             raise ValueError("MAX_CONTENT_LENGTH must be > 0")
         if self.auto_backup_dir and not isinstance(self.auto_backup_dir, Path):
-            self.auto_backup_dir = Path(self.auto_backup_dir)
+            object.__setattr__(self, "auto_backup_dir", Path(self.auto_backup_dir))
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class ExperimentConfig:
     """Experiment configuration - experimental toggles and thresholds."""
 
@@ -95,11 +95,14 @@ class ExperimentConfig:
     # Retrieval mode
     retrieval_mode: str = "hybrid_rrf"
     rrf_k: int = 60
+    bm25_max_df_ratio: float = 0.0  # 0 = keep all terms
 
     # Embedding model
     embedding_model_name: str = "intfloat/multilingual-e5-base"
     embedding_dim: int = 768
     embedding_top_n: int = 300
+    embedding_index_dtype: str = "float32"  # float32 | float16 | int8 (in-memory index)
+    embedding_ann_backend: str = "exact"  # exact | faiss (HNSW, approximate)
 
     # HYDE (Hypothetical Document Embeddings)
     hyde_enabled: bool = False
@@ -132,17 +135,25 @@ class ExperimentConfig:
             raise ValueError("AUTO_CONFIRM_V2_MIN_CHUNK_LEN must be >= 0")
         if self.rrf_k <= 0:
             raise ValueError("RRF_K must be > 0")
+        if not 0.0 <= self.bm25_max_df_ratio <= 1.0:
+            raise ValueError("BM25_MAX_DF_RATIO must be between 0.0 and 1.0")
         if self.embedding_dim <= 0:
             raise ValueError("EMBEDDING_DIM must be > 0")
         if not 0.0 <= self.hyde_embed_weight <= 1.0:
             raise ValueError("HYDE_EMBED_WEIGHT must be between 0.0 and 1.0")
         if not 0.0 <= self.hyde_embed_weight_orig <= 1.0:
             raise ValueError("HYDE_EMBED_WEIGHT_ORIG must be between 0.0 and 1.0")
+        if self.embedding_index_dtype not in ("float32", "float16", "int8"):
+            raise ValueError(
+                "EMBEDDING_INDEX_DTYPE must be 'float32', 'float16' or 'int8'"
+            )
+        if self.embedding_ann_backend not in ("exact", "faiss"):
+            raise ValueError("EMBEDDING_ANN_BACKEND must be 'exact' or 'faiss'")
         if self.hyde_strategy not in ("blend", "best_of_two"):
             raise ValueError("HYDE_STRATEGY must be 'blend' or 'best_of_two'")
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class AppConfig:
     """Application configuration - composition of runtime and experiment configs."""
 
@@ -0,0 +1,40 @@
+"""
+Database path helpers shared by the SQLite maintenance scripts.
+
+Provides resolve_db_path(), which turns a --db argument (or the configured
+SQLALCHEMY database URI when it is omitted) into a filesystem path.
+"""
+
+import re
+from pathlib import Path
+from typing import Optional
+from urllib.parse import urlparse
+
+# sqlite:///relative.db, sqlite:////abs/path.db, sqlite://legacy.db
+_SQLITE_URI_RE = re.compile(r"^sqlite:///?(.*)$")
+
+
+def db_path_from_uri(uri: str) -> Path:
+    """Extract the database file path from a SQLAlchemy URI."""
+    match = _SQLITE_URI_RE.match(uri)
+    if match:
+        return Path(match.group(1))
+    return Path(urlparse(uri).path)
+
+
+def resolve_db_path(db_arg: Optional[str]) -> Path:
+    """
+    Resolve the target database path for a script.
+
+    The config package is only imported when --db is omitted, so scripts given
+    an explicit path never build the application config.
+    """
+    if db_arg:
+        return Path(db_arg)
+
+    from config import get_config
+
+    return db_path_from_uri(get_config().runtime.db_uri)
+
+
+__all__ = ["db_path_from_uri", "resolve_db_path"]
@@ -6,9 +6,13 @@ Provides SafetyLevel enum and require_confirmation() function.
 
 import os
 import sys
+import time
 from enum import Enum
 from typing import Optional, Callable, Any
 
+_TRUTHY = frozenset(("1", "true", "yes", "on"))
+_HEADER_TIME_FMT = "%Y-%m-%d %H:%M:%S UTC"
+
 
 class SafetyLevel(Enum):
     """Standard safety levels for scripts."""
@@ -48,7 +52,7 @@ def require_confirmation(
     env_allowed = False
     if env_flag:
         env_value = os.environ.get(env_flag)
-        env_allowed = env_value and env_value.lower() in ("1", "true", "yes", "on")
+        env_allowed = bool(env_value) and env_value.lower() in _TRUTHY
 
     if env_allowed or cli_flag:
         print(f"[CONFIRMED] {message}")
@@ -70,9 +74,7 @@ def print_script_header(script_name: str, target_db: Optional[str] = None) -> No
         script_name: Name of the script being run
         target_db: Target database path (if applicable)
     """
-    from datetime import datetime
-
-    timestamp = datetime.utcnow().strftime("%Y-%m-%d %H:%M:%S UTC")
+    timestamp = time.strftime(_HEADER_TIME_FMT, time.gmtime())
     print(f"[{script_name}] Started at {timestamp}")
     if target_db:
         print(f"[{script_name}] Target DB: {target_db}")
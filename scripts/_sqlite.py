@@ -0,0 +1,25 @@
+"""
+SQLite connection helpers shared by the SQLite maintenance scripts.
+
+Provides optimize_after_write(), run once before closing a connection that
+bulk-modified the database.
+"""
+
+import sqlite3
+
+
+def optimize_after_write(conn: sqlite3.Connection) -> None:
+    """
+    Refresh planner statistics and fold the WAL back into the main file.
+
+    Errors (e.g. a read-only mount) are reported and ignored: the data has
+    already been committed, so maintenance must not fail the script.
+    """
+    try:
+        conn.execute("PRAGMA optimize")
+        conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    except sqlite3.OperationalError as exc:
+        print(f"Skipping SQLite maintenance: {exc}")
+
+
+__all__ = ["optimize_after_write"]
@@ -7,49 +7,41 @@ Usage:
 from __future__ import annotations
 
 import argparse
+import heapq
+import os
 import sqlite3
 import sys
-from datetime import datetime
+import time
 from pathlib import Path
-from urllib.parse import urlparse
 
 ROOT_DIR = Path(__file__).resolve().parents[1]
 if str(ROOT_DIR) not in sys.path:
     sys.path.append(str(ROOT_DIR))
 
-
-def _resolve_db_path(db_arg: str | None) -> Path:
-    if db_arg:
-        return Path(db_arg)
-
-    from config import Config
-
-    uri = Config.SQLALCHEMY_DATABASE_URI
-    if uri.startswith("sqlite:///"):
-        return Path(uri.replace("sqlite:///", "", 1))
-    if uri.startswith("sqlite://"):
-        return Path(uri.replace("sqlite://", "", 1))
-    parsed = urlparse(uri)
-    return Path(parsed.path)
+try:
+    from scripts._paths import resolve_db_path
+except ModuleNotFoundError:
+    from _paths import resolve_db_path
 
 
 def _backup_path(db_path: Path, backup_dir: Path) -> Path:
-    timestamp = datetime.utcnow().strftime("%Y%m%d_%H%M%S")
+    timestamp = time.strftime("%Y%m%d_%H%M%S", time.gmtime())
     return backup_dir / f"{db_path.name}.{timestamp}"
 
 
 def _prune_backups(backup_dir: Path, db_name: str, keep: int) -> int:
     if keep <= 0:
         return 0
-    pattern = f"{db_name}.*"
-    backups = sorted(backup_dir.glob(pattern))
-    if len(backups) <= keep:
+    prefix = f"{db_name}."
+    with os.scandir(backup_dir) as entries:
+        names = [entry.name for entry in entries if entry.name.startswith(prefix)]
+    excess = len(names) - keep
+    if excess <= 0:
         return 0
-    removed = 0
-    for path in backups[: len(backups) - keep]:
-        path.unlink(missing_ok=True)
-        removed += 1
-    return removed
+    # Timestamped names sort chronologically; only the oldest `excess` are needed.
+    for name in heapq.nsmallest(excess, names):
+        (backup_dir / name).unlink(missing_ok=True)
+    return excess
 
 
 def hot_backup(db_path: Path, backup_dir: Path, keep: int) -> Path:
@@ -79,7 +71,7 @@ def main() -> None:
     )
     args = parser.parse_args()
 
-    db_path = _resolve_db_path(args.db)
+    db_path = resolve_db_path(args.db)
     backup_dir = Path(args.backup_dir)
     backup_path = hot_backup(db_path, backup_dir, args.keep)
     print(f"Backup created: {backup_path}")
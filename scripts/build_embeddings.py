@@ -17,13 +17,16 @@ ROOT_DIR = Path(__file__).resolve().parents[1]
 if str(ROOT_DIR) not in sys.path:
     sys.path.append(str(ROOT_DIR))
 
+import numpy as np
+from sqlalchemy import func, select, text
+
 from app import create_app, db
-from app.models import LectureChunk, LectureChunkEmbedding
+from app.models import LectureChunk
 from app.services.embedding_utils import (
     DEFAULT_EMBEDDING_DIM,
     DEFAULT_EMBEDDING_MODEL_NAME,
     embed_texts,
-    encode_embedding,
+    enable_half_precision,
 )
 
 
@@ -37,62 +40,100 @@ def _normalize_db_uri(db_value: str | None) -> str | None:
     return f"sqlite:///{path.as_posix()}"
 
 
+# lecture_chunk_embeddings has no ORM model; retrieval reads it with raw SQL too.
+_DELETE_EMBEDDINGS_SQL = text("DELETE FROM lecture_chunk_embeddings")
+_EXISTING_IDS_SQL = text(
+    "SELECT chunk_id FROM lecture_chunk_embeddings WHERE model_name = :model_name"
+)
+_INSERT_EMBEDDING_SQL = text(
+    """
+    INSERT INTO lecture_chunk_embeddings (chunk_id, lecture_id, model_name, embedding)
+    VALUES (:chunk_id, :lecture_id, :model_name, :embedding)
+    """
+)
+
+
+def _iter_chunk_batches(batch_size: int):
+    """Yield (id, lecture_id, content) rows in id order, one page at a time.
+
+    Keyset pagination keeps only one batch of chunk text in memory and holds no
+    cursor open across the per-batch commits below.
+    """
+    stmt = (
+        select(LectureChunk.id, LectureChunk.lecture_id, LectureChunk.content)
+        .order_by(LectureChunk.id)
+        .limit(batch_size)
+    )
+    last_id = None
+    while True:
+        page_stmt = stmt if last_id is None else stmt.where(LectureChunk.id > last_id)
+        batch = db.session.execute(page_stmt).all()
+        if not batch:
+            return
+        yield batch
+        last_id = batch[-1].id
+
+
 def build_embeddings(
     db_uri: str,
     model_name: str,
     dim: int,
     batch_size: int,
     rebuild: bool,
+    dry_run: bool = False,
+    half_precision: bool = False,
 ) -> None:
     app = create_app("default", db_uri_override=db_uri, skip_migration_check=True)
     with app.app_context():
+        if half_precision:
+            if enable_half_precision(model_name):
+                print("Encoding with fp16 on CUDA")
+            else:
+                print("--fp16 ignored: model is not on a CUDA device")
+
         if rebuild:
             print("Deleting existing embeddings (REBUILD mode)")
             if not dry_run:
                 # Table uses chunk_id as PK, so multiple models cannot coexist.
                 # Clear all rows on rebuild to avoid UNIQUE constraint errors.
-                LectureChunkEmbedding.query.delete(synchronize_session=False)
+                db.session.execute(_DELETE_EMBEDDINGS_SQL)
                 db.session.commit()
             else:
                 print("[DRY-RUN] Skipping database write")
 
-        existing_ids = {
-            row.chunk_id
-            for row in LectureChunkEmbedding.query.filter_by(
-                model_name=model_name
-            ).all()
-        }
+        existing_ids = set(
+            db.session.scalars(_EXISTING_IDS_SQL, {"model_name": model_name})
+        )
 
-        chunks = LectureChunk.query.order_by(LectureChunk.id).all()
-        total = len(chunks)
+        total = db.session.scalar(select(func.count(LectureChunk.id))) or 0
         processed = 0
 
-        for i in range(0, total, batch_size):
-            batch = chunks[i : i + batch_size]
+        for batch in _iter_chunk_batches(batch_size):
             texts = [chunk.content for chunk in batch]
             vectors = embed_texts(texts, model_name, dim, is_query=False)
-
-            inserts = []
-            for chunk, vec in zip(batch, vectors):
-                if chunk.id in existing_ids:
-                    continue
-                inserts.append(
-                    LectureChunkEmbedding(
-                        chunk_id=chunk.id,
-                        lecture_id=chunk.lecture_id,
-                        model_name=model_name,
-                        embedding=encode_embedding(vec),
-                    )
-                )
+            # One float32 conversion per batch; each row's blob is then a plain
+            # slice copy (same bytes as encode_embedding per vector).
+            vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+
+            inserts = [
+                {
+                    "chunk_id": chunk.id,
+                    "lecture_id": chunk.lecture_id,
+                    "model_name": model_name,
+                    "embedding": vec.tobytes(),
+                }
+                for chunk, vec in zip(batch, vectors)
+                if chunk.id not in existing_ids
+            ]
 
             if inserts:
                 if not dry_run:
-                    db.session.add_all(inserts)
+                    db.session.execute(_INSERT_EMBEDDING_SQL, inserts)
                     db.session.commit()
                 else:
                     print(f"[DRY-RUN] Would insert {len(inserts)} embedding rows")
 
-            processed = min(i + batch_size, total)
+            processed += len(batch)
             print(f"Processed {processed}/{total}")
 
 
@@ -112,6 +153,11 @@ def main() -> None:
     )
     parser.add_argument("--batch-size", type=int, default=128)
     parser.add_argument("--rebuild", action="store_true")
+    parser.add_argument(
+        "--fp16",
+        action="store_true",
+        help="Encode in half precision when the model runs on CUDA.",
+    )
     parser.add_argument(
         "--dry-run",
         action="store_true",
@@ -137,6 +183,7 @@ def main() -> None:
         batch_size=args.batch_size,
         rebuild=args.rebuild,
         dry_run=args.dry_run,
+        half_precision=args.fp16,
     )
 
 
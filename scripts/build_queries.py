@@ -22,8 +22,11 @@ from dotenv import load_dotenv
 
 load_dotenv()
 
+from sqlalchemy import delete, select
+
 from app import create_app, db
-from app.models import Question, QuestionQuery
+from config import get_config
+from app.models import Choice, Question, QuestionQuery
 from app.services.query_transformer import get_query_payload
 
 
@@ -37,34 +40,51 @@ def _normalize_db_uri(db_value: str | None) -> str | None:
     return f"sqlite:///{path.as_posix()}"
 
 
-def _build_question_text(question: Question) -> str:
-    choices = [c.content for c in question.choices.order_by("choice_number").all()]
-    question_text = question.content or ""
-    if choices:
-        question_text = f"{question_text}\n" + " ".join(choices)
-    return question_text.strip()
+_ID_BATCH_SIZE = 500
+
+
+def _build_question_texts(question_ids: list[int]) -> dict[int, str]:
+    """Build the query text for each question with two queries per id batch.
+
+    Same text as the per-question form (content, then choices in choice_number
+    order joined by spaces) without a lazy choices query per worker call.
+    """
+    texts: dict[int, str] = {}
+    for start in range(0, len(question_ids), _ID_BATCH_SIZE):
+        batch = question_ids[start : start + _ID_BATCH_SIZE]
+        contents = dict(
+            db.session.execute(
+                select(Question.id, Question.content).where(Question.id.in_(batch))
+            ).all()
+        )
+        choices: dict[int, list[str]] = {}
+        for qid, content in db.session.execute(
+            select(Choice.question_id, Choice.content)
+            .where(Choice.question_id.in_(batch))
+            .order_by(Choice.question_id, Choice.choice_number, Choice.id)
+        ):
+            choices.setdefault(qid, []).append(content)
+        for qid, content in contents.items():
+            question_text = content or ""
+            if qid in choices:
+                question_text = f"{question_text}\n" + " ".join(choices[qid])
+            texts[qid] = question_text.strip()
+    return texts
 
 
 def _load_question_ids(path: str) -> list[int]:
-    ids: list[int] = []
-    for raw in Path(path).read_text(encoding="utf-8").splitlines():
-        raw = raw.strip()
-        if not raw:
-            continue
-        try:
-            ids.append(int(raw))
-        except ValueError:
-            continue
-    return ids
+    # bytes.isdigit() skips blank and non-numeric lines without raising and
+    # catching ValueError for each one.
+    lines = (raw.strip() for raw in Path(path).read_bytes().splitlines())
+    return [int(line) for line in lines if line.isdigit()]
 
 
 def _collect_question_ids(
-    app,
+    prompt_version: str,
     skip_existing: bool,
     limit: int | None,
     question_ids_file: str | None,
 ) -> list[int]:
-    prompt_version = app.config.get("HYDE_PROMPT_VERSION", "hyde_v1")
     query = Question.query.order_by(Question.id.asc())
 
     if question_ids_file:
@@ -84,25 +104,27 @@ def _collect_question_ids(
     return [row.id for row in query.all()]
 
 
-def _process_question(
-    app, question_id: int, force: bool, dry_run: bool = False
-) -> bool:
-    with app.app_context():
-        prompt_version = app.config.get("HYDE_PROMPT_VERSION", "hyde_v1")
-        if force:
-            if not dry_run:
-                QuestionQuery.query.filter_by(
-                    question_id=question_id, prompt_version=prompt_version
-                ).delete(synchronize_session=False)
-                db.session.commit()
-            else:
-                print(f"[DRY-RUN] Would delete query for Q{question_id}")
-            return False
+def _delete_existing_queries(
+    question_ids: list[int], prompt_version: str, dry_run: bool = False
+) -> None:
+    """Drop stored queries for --force in one transaction before any worker runs."""
+    if dry_run:
+        print(f"[DRY-RUN] Would delete queries for {len(question_ids)} questions")
+        return
+    for start in range(0, len(question_ids), _ID_BATCH_SIZE):
+        batch = question_ids[start : start + _ID_BATCH_SIZE]
+        db.session.execute(
+            delete(QuestionQuery)
+            .where(QuestionQuery.prompt_version == prompt_version)
+            .where(QuestionQuery.question_id.in_(batch))
+        )
+    db.session.commit()
+
 
-        question = Question.query.get(question_id)
-        if not question:
+def _process_question(app, question_id: int, question_text: str | None) -> bool:
+    with app.app_context():
+        if question_text is None:
             return False
-        question_text = _build_question_text(question)
         payload = get_query_payload(
             question_id,
             question_text,
@@ -164,27 +186,37 @@ def main() -> None:
         raise ValueError("DB path is required.")
 
     app = create_app("default", db_uri_override=db_uri, skip_migration_check=True)
+    # Same version get_query_payload() stores rows under.
+    prompt_version = get_config().experiment.hyde_prompt_version
 
     with app.app_context():
         question_ids = _collect_question_ids(
-            app,
+            prompt_version,
             args.skip_existing and not args.force,
             args.limit,
             args.question_ids_file,
         )
+        if args.force:
+            _delete_existing_queries(question_ids, prompt_version, args.dry_run)
+        question_texts = _build_question_texts(question_ids)
 
     total = len(question_ids)
     if total == 0:
         print("No questions to process.")
         return
 
+    if args.dry_run:
+        # Workers would call Gemini and commit new question_queries rows.
+        print(f"[DRY-RUN] Would build queries for {total} questions")
+        return
+
     success = 0
     failures = 0
     max_workers = max(1, args.concurrency)
 
     with ThreadPoolExecutor(max_workers=max_workers) as executor:
         futures = {
-            executor.submit(_process_question, app, qid, args.force, args.dry_run): qid
+            executor.submit(_process_question, app, qid, question_texts.get(qid)): qid
             for qid in question_ids
         }
         for future in as_completed(futures):
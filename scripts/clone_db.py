@@ -1,5 +1,5 @@
 """
-Clone a SQLite database using the backup API.
+Clone a SQLite database with VACUUM INTO (compacted, single sequential write).
 
 Usage:
   python scripts/clone_db.py --db data/exam.db --out data/dev.db
@@ -7,29 +7,19 @@ Usage:
 from __future__ import annotations
 
 import argparse
+import os
 import sqlite3
 import sys
 from pathlib import Path
-from urllib.parse import urlparse
 
 ROOT_DIR = Path(__file__).resolve().parents[1]
 if str(ROOT_DIR) not in sys.path:
     sys.path.append(str(ROOT_DIR))
 
-
-def _resolve_db_path(db_arg: str | None) -> Path:
-    if db_arg:
-        return Path(db_arg)
-
-    from config import Config
-
-    uri = Config.SQLALCHEMY_DATABASE_URI
-    if uri.startswith("sqlite:///"):
-        return Path(uri.replace("sqlite:///", "", 1))
-    if uri.startswith("sqlite://"):
-        return Path(uri.replace("sqlite://", "", 1))
-    parsed = urlparse(uri)
-    return Path(parsed.path)
+try:
+    from scripts._paths import resolve_db_path
+except ModuleNotFoundError:
+    from _paths import resolve_db_path
 
 
 def clone_db(src_path: Path, dest_path: Path) -> None:
@@ -37,10 +27,19 @@ def clone_db(src_path: Path, dest_path: Path) -> None:
         raise FileNotFoundError(f"SQLite DB not found: {src_path}")
 
     dest_path.parent.mkdir(parents=True, exist_ok=True)
-    with sqlite3.connect(src_path.as_posix()) as src, sqlite3.connect(
-        dest_path.as_posix()
-    ) as dst:
-        src.backup(dst)
+    # VACUUM INTO refuses to overwrite an existing file, so write a sibling temp
+    # file and swap it in; the clone then replaces any previous copy atomically.
+    tmp_path = dest_path.with_name(f"{dest_path.name}.tmp")
+    tmp_path.unlink(missing_ok=True)
+    src = sqlite3.connect(src_path.as_posix())
+    try:
+        src.execute("VACUUM INTO ?", (tmp_path.as_posix(),))
+    except BaseException:
+        tmp_path.unlink(missing_ok=True)
+        raise
+    finally:
+        src.close()
+    os.replace(tmp_path, dest_path)
 
 
 def main() -> None:
@@ -53,7 +52,7 @@ def main() -> None:
     )
     args = parser.parse_args()
 
-    src_path = _resolve_db_path(args.db)
+    src_path = resolve_db_path(args.db)
     dest_path = Path(args.out)
     clone_db(src_path, dest_path)
     print(f"Cloned {src_path} -> {dest_path}")
@@ -9,10 +9,9 @@ Usage:
 """
 
 import argparse
-import shutil
 import sqlite3
 import sys
-from datetime import datetime, timezone
+import time
 from pathlib import Path
 try:
     from scripts._safety import SafetyLevel, require_confirmation, print_script_header
@@ -26,14 +25,18 @@ def _default_db_paths():
 
 
 def _has_keywords_column(conn):
-    columns = [row[1] for row in conn.execute("PRAGMA table_info(lectures)")]
-    return "keywords" in columns
+    row = conn.execute(
+        "SELECT 1 FROM pragma_table_info('lectures') WHERE name = 'keywords'"
+    ).fetchone()
+    return row is not None
 
 
-def _backup_db(path):
-    timestamp = datetime.now(timezone.utc).strftime("%Y%m%d%H%M%S")
+def _backup_db(conn, path):
+    timestamp = time.strftime("%Y%m%d%H%M%S", time.gmtime())
     backup_path = path.with_suffix(path.suffix + f".bak.{timestamp}")
-    shutil.copy2(path, backup_path)
+    # Consistent, compacted snapshot through the open connection rather than a
+    # byte copy of a file that may have a hot journal next to it.
+    conn.execute("VACUUM INTO ?", (backup_path.as_posix(),))
     return backup_path
 
 
@@ -48,7 +51,7 @@ def _drop_keywords(path, no_backup, dry_run=False):
             return
 
         if not no_backup:
-            backup_path = _backup_db(path)
+            backup_path = _backup_db(conn, path)
             print(f"{path}: backup -> {backup_path}")
 
         if dry_run:
@@ -8,9 +8,11 @@ from __future__ import annotations
 
 import argparse
 import csv
-import json
 import re
 import sys
+from bisect import bisect_right
+from collections import defaultdict
+from itertools import accumulate
 from pathlib import Path
 
 ROOT_DIR = Path(__file__).resolve().parents[1]
@@ -18,56 +20,116 @@ if str(ROOT_DIR) not in sys.path:
     sys.path.append(str(ROOT_DIR))
 
 from dotenv import load_dotenv
+from sqlalchemy import select
+from sqlalchemy.orm import selectinload
 
 load_dotenv(ROOT_DIR / ".env")
 
-from app import create_app
-from app.models import EvaluationLabel, LectureChunk
+from app import create_app, db
+from app.models import Choice, EvaluationLabel, LectureChunk
 from app.services import retrieval_features
+from app.services.json_utils import dumps_json
+
+# Labels (with their questions) are streamed from the DB in batches of this size.
+_LABEL_BATCH_SIZE = 500
+# Rows are written as they are produced; a large buffer amortizes the writes.
+_CSV_BUFFER_SIZE = 1 << 20
+
+# gold_pages like "3-5; 10, 7~12": ranges separated by ";" or ",".
+_PAGE_SEP_RE = re.compile(r"[;,]")
+_PAGE_RANGE_RE = re.compile(r"\s*(\d+)\s*(?:[-~]\s*(\d+)\s*)?")
 
 
 def _parse_page_ranges(raw: str) -> list[tuple[int, int]]:
     if not raw:
         return []
-    parts = re.split(r"[;,]", raw)
     ranges = []
-    for part in parts:
-        part = part.strip()
-        if not part:
-            continue
-        if "-" in part:
-            left, right = part.split("-", 1)
-        elif "~" in part:
-            left, right = part.split("~", 1)
-        else:
-            left, right = part, part
-        try:
-            start = int(left.strip())
-            end = int(right.strip())
-        except ValueError:
+    for part in _PAGE_SEP_RE.split(raw):
+        match = _PAGE_RANGE_RE.fullmatch(part)
+        if not match:
             continue
+        start = int(match.group(1))
+        end = int(match.group(2) or start)
         if start > end:
             start, end = end, start
         ranges.append((start, end))
     return ranges
 
 
-def _find_gold_chunk_id(label: EvaluationLabel) -> int | None:
+# Per lecture: chunks sorted by page_start, their page_start keys, and the
+# running max of page_end (lets the overlap search stop early).
+_PageIndex = tuple[list[tuple[int, int, int]], list[int], list[int]]
+
+
+def _load_chunk_pages(lecture_ids: set[int]) -> dict[int, _PageIndex]:
+    """Fetch (chunk_id, page_start, page_end) for all gold lectures in one query."""
+    by_lecture: dict[int, list[tuple[int, int, int]]] = defaultdict(list)
+    if not lecture_ids:
+        return {}
+    rows = (
+        LectureChunk.query.with_entities(
+            LectureChunk.id,
+            LectureChunk.lecture_id,
+            LectureChunk.page_start,
+            LectureChunk.page_end,
+        )
+        .filter(LectureChunk.lecture_id.in_(lecture_ids))
+        .all()
+    )
+    for chunk_id, lecture_id, page_start, page_end in rows:
+        by_lecture[lecture_id].append((chunk_id, page_start, page_end))
+    return {lecture_id: _index_pages(chunks) for lecture_id, chunks in by_lecture.items()}
+
+
+def _index_pages(chunks: list[tuple[int, int, int]]) -> _PageIndex:
+    chunks.sort(key=lambda chunk: chunk[1])
+    starts = [page_start for _, page_start, _ in chunks]
+    max_ends = list(accumulate((page_end for _, _, page_end in chunks), max))
+    return chunks, starts, max_ends
+
+
+def _find_gold_chunk_id(label: EvaluationLabel, by_lecture: dict[int, _PageIndex]) -> int | None:
     if not label.gold_lecture_id or not label.gold_pages:
         return None
     ranges = _parse_page_ranges(label.gold_pages)
     if not ranges:
         return None
-    chunks = LectureChunk.query.filter_by(lecture_id=label.gold_lecture_id).all()
+    index = by_lecture.get(label.gold_lecture_id)
+    if index is None:
+        return None
+    chunks, starts, max_ends = index
     for start, end in ranges:
-        for chunk in chunks:
-            if chunk.page_start <= end and chunk.page_end >= start:
-                return chunk.id
+        # Only chunks with page_start <= end can overlap; walk them back until
+        # no earlier chunk reaches `start`. The lowest id wins, as before.
+        best = None
+        i = bisect_right(starts, end) - 1
+        while i >= 0 and max_ends[i] >= start:
+            chunk_id, _, page_end = chunks[i]
+            if page_end >= start and (best is None or chunk_id < best):
+                best = chunk_id
+            i -= 1
+        if best is not None:
+            return best
     return None
 
 
-def _build_question_text(question) -> str:
-    choices = [c.content for c in question.choices.order_by("choice_number").all()]
+def _load_choice_texts(question_ids: set[int]) -> dict[int, list[str]]:
+    """Fetch choice contents for all questions in one query, in choice_number order."""
+    choices: dict[int, list[str]] = defaultdict(list)
+    if not question_ids:
+        return choices
+    rows = (
+        Choice.query.with_entities(Choice.question_id, Choice.content)
+        .filter(Choice.question_id.in_(question_ids))
+        .order_by(Choice.question_id, Choice.choice_number, Choice.id)
+        .all()
+    )
+    for question_id, content in rows:
+        choices[question_id].append(content)
+    return choices
+
+
+def _build_question_text(question, choices: list[str]) -> str:
     question_text = question.content or ""
     if choices:
         question_text = f"{question_text}\n" + " ".join(choices)
@@ -88,44 +150,6 @@ def main() -> None:
 
     app = create_app("default", db_uri_override=f"sqlite:///{db_path.resolve().as_posix()}")
 
-    rows = []
-    with app.app_context():
-        labels = EvaluationLabel.query.order_by(EvaluationLabel.id.asc()).all()
-        for label in labels:
-            if label.is_ambiguous and not args.include_ambiguous:
-                continue
-            if not label.gold_lecture_id:
-                continue
-            question = label.question
-            if not question:
-                continue
-            question_text = _build_question_text(question)
-            artifacts = retrieval_features.build_retrieval_artifacts(
-                question_text,
-                question.id,
-                top_n=80,
-                top_k=args.top_k,
-            )
-            features = artifacts.features
-            rows.append(
-                {
-                    "question_id": question.id,
-                    "gold_lecture_id": label.gold_lecture_id,
-                    "gold_chunk_id": _find_gold_chunk_id(label),
-                    "bm25_topk": json.dumps(features.get("bm25_topk", []), ensure_ascii=False),
-                    "embed_topk": json.dumps(features.get("embed_topk", []), ensure_ascii=False),
-                    "hybrid_topk": json.dumps(features.get("hybrid_topk", []), ensure_ascii=False),
-                    "bm25_margin": features.get("bm25_margin"),
-                    "embed_margin": features.get("embed_margin"),
-                    "bm25_hybrid_agree": features.get("bm25_hybrid_agree"),
-                    "embed_hybrid_agree": features.get("embed_hybrid_agree"),
-                    "bm25_embed_agree": features.get("bm25_embed_agree"),
-                    "hybrid_top1_bm25_rank": features.get("hybrid_top1_bm25_rank"),
-                    "hybrid_top1_embed_rank": features.get("hybrid_top1_embed_rank"),
-                    "hybrid_top1_chunk_len": features.get("hybrid_top1_chunk_len"),
-                }
-            )
-
     out_path = Path(args.out)
     out_path.parent.mkdir(parents=True, exist_ok=True)
     fieldnames = [
@@ -144,12 +168,60 @@ def main() -> None:
         "hybrid_top1_embed_rank",
         "hybrid_top1_chunk_len",
     ]
-    with out_path.open("w", encoding="utf-8", newline="") as handle:
+    n_rows = 0
+    with app.app_context(), out_path.open(
+        "w", encoding="utf-8", newline="", buffering=_CSV_BUFFER_SIZE
+    ) as handle:
         writer = csv.DictWriter(handle, fieldnames=fieldnames)
         writer.writeheader()
-        writer.writerows(rows)
-
-    print(f"Wrote {len(rows)} rows to {out_path}")
+        stmt = (
+            select(EvaluationLabel)
+            .options(selectinload(EvaluationLabel.question))
+            .order_by(EvaluationLabel.id.asc())
+        )
+        result = db.session.execute(stmt, execution_options={"yield_per": _LABEL_BATCH_SIZE})
+        for labels in result.scalars().partitions():
+            choice_texts = _load_choice_texts({label.question_id for label in labels})
+            by_lecture = _load_chunk_pages(
+                {label.gold_lecture_id for label in labels if label.gold_lecture_id}
+            )
+            for label in labels:
+                if label.is_ambiguous and not args.include_ambiguous:
+                    continue
+                if not label.gold_lecture_id:
+                    continue
+                question = label.question
+                if not question:
+                    continue
+                question_text = _build_question_text(question, choice_texts.get(question.id, []))
+                artifacts = retrieval_features.build_retrieval_artifacts(
+                    question_text,
+                    question.id,
+                    top_n=80,
+                    top_k=args.top_k,
+                )
+                features = artifacts.features
+                writer.writerow(
+                    {
+                        "question_id": question.id,
+                        "gold_lecture_id": label.gold_lecture_id,
+                        "gold_chunk_id": _find_gold_chunk_id(label, by_lecture),
+                        "bm25_topk": dumps_json(features.get("bm25_topk", [])),
+                        "embed_topk": dumps_json(features.get("embed_topk", [])),
+                        "hybrid_topk": dumps_json(features.get("hybrid_topk", [])),
+                        "bm25_margin": features.get("bm25_margin"),
+                        "embed_margin": features.get("embed_margin"),
+                        "bm25_hybrid_agree": features.get("bm25_hybrid_agree"),
+                        "embed_hybrid_agree": features.get("embed_hybrid_agree"),
+                        "bm25_embed_agree": features.get("bm25_embed_agree"),
+                        "hybrid_top1_bm25_rank": features.get("hybrid_top1_bm25_rank"),
+                        "hybrid_top1_embed_rank": features.get("hybrid_top1_embed_rank"),
+                        "hybrid_top1_chunk_len": features.get("hybrid_top1_chunk_len"),
+                    }
+                )
+                n_rows += 1
+
+    print(f"Wrote {n_rows} rows to {out_path}")
 
 
 if __name__ == "__main__":
@@ -7,27 +7,78 @@ Usage:
 from __future__ import annotations
 
 import argparse
-import copy
 import csv
 import json
 import sys
-from concurrent.futures import ThreadPoolExecutor, as_completed
+import threading
+from collections import defaultdict
+from contextlib import contextmanager, nullcontext
+from dataclasses import dataclass
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from datetime import datetime
+from functools import partial
+from itertools import islice, repeat
+from operator import attrgetter
 from pathlib import Path
 
 ROOT_DIR = Path(__file__).resolve().parents[1]
 if str(ROOT_DIR) not in sys.path:
     sys.path.append(str(ROOT_DIR))
 
+import numpy as np
 from dotenv import load_dotenv
+from sqlalchemy import select, text
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import contains_eager
 
 load_dotenv(ROOT_DIR / ".env")
 
 from app import create_app
 from app import db
-from app.models import EvaluationLabel, Question
+from app.models import Choice, EvaluationLabel, Question
 from app.services import retrieval, retrieval_features
-from app.services.classifier_cache import ClassifierResultCache, build_config_hash
+from app.services.ai_classifier import GeminiClassifier
+from app.services.classifier_cache import (
+    ClassifierResultCache,
+    RetrievalArtifactCache,
+    build_config_hash,
+)
+from app.services.context_expander import expand_candidates
+from config import get_config
+
+# Chunks retrieved per question before aggregation into lecture candidates.
+_RETRIEVAL_TOP_N = 80
+# Retrieval results cache file under DATA_CACHE_DIR (see --no-retrieval-cache).
+_RETRIEVAL_CACHE_NAME = "retrieval_artifact_cache.json"
+
+# Labels (with their questions) are streamed from the DB in batches of this size.
+_LABEL_BATCH_SIZE = 500
+
+# Per-thread app context (and classifier) for the retrieval/classifier worker pools.
+_worker_state = threading.local()
+# Classifier tasks kept in flight per worker thread.
+_IN_FLIGHT_PER_WORKER = 4
+# Upper bound on classifier threads with --io-bound.
+_IO_BOUND_MAX_WORKERS = 32
+
+
+@dataclass(slots=True)
+class EvalItem:
+    """One evaluated label: retrieval output plus the (auto/AI) prediction."""
+
+    label: EvaluationLabel
+    question: Question
+    question_text: str
+    candidates: list[dict]
+    candidate_ids: list[int]
+    candidate_id_set: set[int]
+    auto_confirm: bool
+    uncertain: bool
+    auto_confirm_lecture_id: int | None
+    ai_suggested_lecture_id: int | None = None
+    ai_final_lecture_id: int | None = None
+    ai_confidence: float = 0.0
+    ai_model_name: str = ""
 
 
 def _parse_list(value: str, cast=float):
@@ -45,33 +96,47 @@ def _parse_list(value: str, cast=float):
     return items
 
 
-def _build_question_text(question: Question) -> str:
-    choices = [c.content for c in question.choices.order_by("choice_number").all()]
+def _load_choice_texts(question_ids: set[int]) -> dict[int, list[str]]:
+    """Fetch choice contents for all questions in one query, in choice_number order."""
+    choices: dict[int, list[str]] = defaultdict(list)
+    if not question_ids:
+        return choices
+    rows = (
+        Choice.query.with_entities(Choice.question_id, Choice.content)
+        .filter(Choice.question_id.in_(question_ids))
+        .order_by(Choice.question_id, Choice.choice_number, Choice.id)
+        .all()
+    )
+    for question_id, content in rows:
+        choices[question_id].append(content)
+    return choices
+
+
+def _build_question_text(question: Question, choices: list[str]) -> str:
     question_text = question.content or ""
     if choices:
         question_text = f"{question_text}\n" + " ".join(choices)
     return question_text.strip()
 
 
+def _evidence_payload(ev: dict) -> dict:
+    return {
+        "page_start": ev.get("page_start"),
+        "page_end": ev.get("page_end"),
+        "snippet": ev.get("snippet"),
+        "chunk_id": ev.get("chunk_id"),
+    }
+
+
 def _candidate_payload(candidates):
-    payload = []
-    for cand in candidates:
-        payload.append(
-            {
-                "id": cand.get("id"),
-                "full_path": cand.get("full_path"),
-                "evidence": [
-                    {
-                        "page_start": ev.get("page_start"),
-                        "page_end": ev.get("page_end"),
-                        "snippet": ev.get("snippet"),
-                        "chunk_id": ev.get("chunk_id"),
-                    }
-                    for ev in (cand.get("evidence") or [])
-                ],
-            }
-        )
-    return payload
+    return [
+        {
+            "id": cand.get("id"),
+            "full_path": cand.get("full_path"),
+            "evidence": list(map(_evidence_payload, cand.get("evidence") or [])),
+        }
+        for cand in candidates
+    ]
 
 
 def _write_csv(path: Path, rows: list[dict], fieldnames: list[str]) -> None:
@@ -144,28 +209,247 @@ def _classifier_config_hash(app, retrieval_mode: str, max_k: int, evidence_per_l
     return build_config_hash(cfg)
 
 
-def _classify_worker(app, question_id: int, candidates: list[dict], expand_context: bool) -> tuple[int, dict]:
-    from app.models import Question
-    from app.services.ai_classifier import GeminiClassifier
-    from app.services.context_expander import expand_candidates
+# Cheap per-table aggregates over every DB input retrieval reads, so
+# re-chunking, new embeddings, FTS re-syncs, HyDE queries and lecture/block
+# renames (candidates carry full_path) miss the retrieval cache without
+# reading the corpus itself.
+_CORPUS_FINGERPRINT_SQL = (
+    text(
+        "SELECT COUNT(*), MAX(id), SUM(lecture_id), SUM(page_start + page_end), "
+        "SUM(length(content)) FROM lecture_chunks"
+    ),
+    text(
+        "SELECT COUNT(*), MAX(chunk_id), SUM(lecture_id), SUM(length(embedding)) "
+        "FROM lecture_chunk_embeddings WHERE model_name = :model"
+    ),
+    text("SELECT COUNT(*), MAX(rowid) FROM lecture_chunks_fts"),
+    text("SELECT COUNT(*), MAX(id), MAX(updated_at) FROM lectures"),
+    text("SELECT COUNT(*), MAX(id), MAX(updated_at) FROM blocks"),
+    text(
+        "SELECT COUNT(*), SUM(question_id), MAX(created_at), "
+        "SUM(length(lecture_style_query) + length(keywords_json) + length(negative_keywords_json)) "
+        "FROM question_queries"
+    ),
+)
+
+
+def _corpus_fingerprint(embedding_model: str) -> list | None:
+    """Aggregates identifying the corpus, or None if a table can't be read."""
+    fingerprint = []
+    try:
+        for stmt in _CORPUS_FINGERPRINT_SQL:
+            fingerprint.append(list(db.session.execute(stmt, {"model": embedding_model}).one()))
+    except SQLAlchemyError as exc:
+        db.session.rollback()
+        print(f"Skipping retrieval cache; corpus fingerprint failed: {exc}")
+        return None
+    return fingerprint
+
+
+def _retrieval_config_hash(
+    db_path: Path, retrieval_mode: str, max_k: int, evidence_per_lecture: int
+) -> str | None:
+    exp = get_config().experiment
+    corpus = _corpus_fingerprint(exp.embedding_model_name)
+    if corpus is None:
+        return None
+    cfg = {
+        "db": db_path.resolve().as_posix(),
+        "corpus": corpus,
+        "retrieval_mode": retrieval_mode,
+        "top_n": _RETRIEVAL_TOP_N,
+        "max_k": max_k,
+        "evidence_per_lecture": evidence_per_lecture,
+        "rrf_k": exp.rrf_k,
+        "bm25_max_df_ratio": exp.bm25_max_df_ratio,
+        "embedding_model": exp.embedding_model_name,
+        "embedding_dim": exp.embedding_dim,
+        "embedding_top_n": exp.embedding_top_n,
+        "embedding_index_dtype": exp.embedding_index_dtype,
+        "embedding_ann_backend": exp.embedding_ann_backend,
+        "hyde_enabled": exp.hyde_enabled,
+        "hyde_prompt_version": exp.hyde_prompt_version,
+        "hyde_strategy": exp.hyde_strategy,
+        "hyde_bm25_variant": exp.hyde_bm25_variant,
+        "hyde_negative_mode": exp.hyde_negative_mode,
+        "hyde_margin_eps": exp.hyde_margin_eps,
+        "hyde_max_keywords": exp.hyde_max_keywords,
+        "hyde_max_negative": exp.hyde_max_negative,
+        "hyde_embed_weight": exp.hyde_embed_weight,
+        "hyde_embed_weight_orig": exp.hyde_embed_weight_orig,
+    }
+    return build_config_hash(cfg)
+
+
+def _retrieve_candidates(
+    question_text: str,
+    question_id: int,
+    retrieval_mode: str,
+    max_k: int,
+    evidence_per_lecture: int,
+) -> dict:
+    artifacts = retrieval_features.build_retrieval_artifacts(
+        question_text,
+        question_id,
+        top_n=_RETRIEVAL_TOP_N,
+        top_k=max_k,
+    )
 
-    with app.app_context():
-        question = db.session.get(Question, question_id)
-        if not question:
-            return question_id, {
-                "lecture_id": None,
-                "confidence": 0.0,
-                "reason": "Missing question",
-                "study_hint": "",
-                "evidence": [],
-                "no_match": True,
-                "model_name": app.config.get("GEMINI_MODEL_NAME", ""),
-            }
-        if expand_context:
-            candidates = expand_candidates(candidates)
-        classifier = GeminiClassifier()
-        result = classifier.classify_single(question, candidates)
-        return question_id, result
+    if retrieval_mode == "hybrid_rrf":
+        chunks = artifacts.hybrid_chunks
+        candidates = retrieval.aggregate_candidates_rrf(
+            chunks,
+            top_k_lectures=max_k,
+            evidence_per_lecture=evidence_per_lecture,
+        )
+    else:
+        chunks = artifacts.bm25_chunks
+        candidates = retrieval.aggregate_candidates(
+            chunks,
+            top_k_lectures=max_k,
+            evidence_per_lecture=evidence_per_lecture,
+        )
+    return {"candidates": candidates, "features": artifacts.features}
+
+
+def _gold_ranks(items: list[EvalItem]) -> tuple[np.ndarray, np.ndarray]:
+    """Locate each item's gold lecture among its candidates.
+
+    Returns (found, positions): a bool mask and the 0-based position of the
+    first matching candidate (meaningful only where found is True).
+    """
+    width = max((len(item.candidate_ids) for item in items), default=0)
+    cand = np.full((len(items), max(width, 1)), -1, dtype=np.int64)
+    for row, item in enumerate(items):
+        ids = [cid if cid is not None else -1 for cid in item.candidate_ids]
+        cand[row, : len(ids)] = ids
+    gold = np.fromiter(
+        (item.label.gold_lecture_id for item in items),
+        dtype=np.int64,
+        count=len(items),
+    )
+    hits = cand == gold[:, None]
+    return hits.any(axis=1), hits.argmax(axis=1)
+
+
+def _accumulate_auto_sweep(
+    items: list[EvalItem],
+    thresholds: list[float],
+    margins: list[float],
+    auto_sweep: dict,
+) -> None:
+    """Count auto-apply totals/correct for every (threshold, margin) gate at once."""
+    if not items or not thresholds or not margins:
+        return
+    conf = np.fromiter(
+        (item.ai_confidence for item in items),
+        dtype=np.float64,
+        count=len(items),
+    )
+    in_candidates = np.fromiter(
+        (
+            bool(item.ai_suggested_lecture_id)
+            and item.ai_suggested_lecture_id in item.candidate_id_set
+            for item in items
+        ),
+        dtype=bool,
+        count=len(items),
+    )
+    correct = np.fromiter(
+        (item.ai_suggested_lecture_id == item.label.gold_lecture_id for item in items),
+        dtype=bool,
+        count=len(items),
+    )
+    gates = np.add.outer(np.asarray(thresholds, dtype=np.float64), np.asarray(margins, dtype=np.float64))
+    eligible = (conf[:, None, None] >= gates[None, :, :]) & in_candidates[:, None, None]
+    totals = eligible.sum(axis=0)
+    corrects = (eligible & correct[:, None, None]).sum(axis=0)
+    for i, threshold in enumerate(thresholds):
+        for j, margin in enumerate(margins):
+            auto_sweep[(threshold, margin)]["total"] += int(totals[i, j])
+            auto_sweep[(threshold, margin)]["correct"] += int(corrects[i, j])
+
+
+def _make_pred_getter(pred_field: str):
+    """Return a callable reading the --pred-field prediction from an EvalItem."""
+    if pred_field == "ai_final_lecture_id":
+        def _final(item: EvalItem):
+            pred_value = item.ai_final_lecture_id
+            return item.question.lecture_id if pred_value is None else pred_value
+
+        return _final
+    if pred_field == "ai_suggested_lecture_id":
+        return attrgetter("ai_suggested_lecture_id")
+    if not hasattr(Question, pred_field):
+        # Unknown fields never match, as with getattr(question, field, None).
+        return lambda item: None
+    return attrgetter(f"question.{pred_field}")
+
+
+def _init_worker(app) -> None:
+    """Push one app context per worker thread; it is reused for every task.
+
+    db.session is scoped to the app context, so each thread also keeps one
+    session; _worker_pool pops the context when the pool closes.
+    """
+    ctx = app.app_context()
+    ctx.push()
+    _worker_state.app = app
+    _worker_state.ctx = ctx
+    _worker_state.classifier = None
+
+
+def _teardown_worker(barrier: threading.Barrier) -> None:
+    # Every worker blocks here until all of them have picked up a teardown
+    # task, so each thread pops exactly its own context.
+    barrier.wait()
+    _worker_state.ctx.pop()
+
+
+@contextmanager
+def _worker_pool(app, max_workers: int):
+    """Thread pool whose workers each keep one app context for their lifetime.
+
+    On exit every worker pops its own context, which removes its session.
+    """
+    executor = ThreadPoolExecutor(
+        max_workers=max_workers,
+        initializer=_init_worker,
+        initargs=(app,),
+    )
+    try:
+        yield executor
+    finally:
+        barrier = threading.Barrier(max_workers)
+        try:
+            teardowns = [executor.submit(_teardown_worker, barrier) for _ in range(max_workers)]
+            for future in teardowns:
+                future.result()
+        finally:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+
+def _classify_worker(question_id: int, candidates: list[dict], expand_context: bool) -> tuple[int, dict]:
+    app = _worker_state.app
+    # The question is re-read in this thread's own session; ORM objects from the
+    # main thread's session must not be shared across threads.
+    question = db.session.get(Question, question_id)
+    if not question:
+        return question_id, {
+            "lecture_id": None,
+            "confidence": 0.0,
+            "reason": "Missing question",
+            "study_hint": "",
+            "evidence": [],
+            "no_match": True,
+            "model_name": app.config.get("GEMINI_MODEL_NAME", ""),
+        }
+    if expand_context:
+        candidates = expand_candidates(candidates)
+    if _worker_state.classifier is None:
+        _worker_state.classifier = GeminiClassifier()
+    result = _worker_state.classifier.classify_single(question, candidates)
+    return question_id, result
 
 
 def evaluate(db_path: Path, args) -> dict:
@@ -176,12 +460,16 @@ def evaluate(db_path: Path, args) -> dict:
         current_threshold = float(app.config.get("AI_CONFIDENCE_THRESHOLD", 0.7))
         current_margin = float(app.config.get("AI_AUTO_APPLY_MARGIN", 0.2))
         retrieval_mode = args.retrieval_mode or app.config.get("RETRIEVAL_MODE", "bm25")
-        labels_query = EvaluationLabel.query.join(Question).order_by(EvaluationLabel.id.asc())
+        labels_stmt = (
+            select(EvaluationLabel)
+            .join(Question)
+            .options(contains_eager(EvaluationLabel.question))
+            .order_by(EvaluationLabel.id.asc())
+        )
         if args.question_ids_file:
             ids = _load_question_ids(args.question_ids_file)
             if ids:
-                labels_query = labels_query.filter(EvaluationLabel.question_id.in_(ids))
-        labels = labels_query.all()
+                labels_stmt = labels_stmt.where(EvaluationLabel.question_id.in_(ids))
 
         max_k = max(args.top_k) if args.top_k else 10
         evidence_per_lecture = 2
@@ -218,90 +506,121 @@ def evaluate(db_path: Path, args) -> dict:
 
         items = []
 
-        for label in labels:
-            if label.is_ambiguous and not args.include_ambiguous:
-                skipped_ambiguous += 1
-                continue
-            if not label.gold_lecture_id:
-                skipped_no_gold += 1
-                continue
-
-            question = label.question
-            if not question:
-                continue
-
-            question_text = _build_question_text(question)
-            artifacts = retrieval_features.build_retrieval_artifacts(
-                question_text,
-                question.id,
-                top_n=80,
-                top_k=max_k,
+        retrieval_cache = None
+        retrieval_hash = None
+        if not args.no_retrieval_cache:
+            retrieval_hash = _retrieval_config_hash(
+                db_path, retrieval_mode, max_k, evidence_per_lecture
             )
-
-            if retrieval_mode == "hybrid_rrf":
-                chunks = artifacts.hybrid_chunks
-                candidates = retrieval.aggregate_candidates_rrf(
-                    chunks,
-                    top_k_lectures=max_k,
-                    evidence_per_lecture=evidence_per_lecture,
-                )
-            else:
-                chunks = artifacts.bm25_chunks
-                candidates = retrieval.aggregate_candidates(
-                    chunks,
-                    top_k_lectures=max_k,
-                    evidence_per_lecture=evidence_per_lecture,
+            if retrieval_hash is not None:
+                retrieval_cache = RetrievalArtifactCache(
+                    get_config().runtime.data_cache_dir / _RETRIEVAL_CACHE_NAME
                 )
 
-            candidate_ids = [c.get("id") for c in candidates]
-            rank = None
-            for idx, cand_id in enumerate(candidate_ids):
-                if cand_id == label.gold_lecture_id:
-                    rank = idx
-                    break
-
-            features = artifacts.features
-            auto_confirm = False
-            if app.config.get("AUTO_CONFIRM_V2_ENABLED", True):
-                auto_confirm = retrieval_features.auto_confirm_v2(
-                    features,
-                    delta=args.auto_confirm_delta
-                    if args.auto_confirm_delta is not None
-                    else float(app.config.get("AUTO_CONFIRM_V2_DELTA", 0.05)),
-                    max_bm25_rank=args.auto_confirm_bm25_rank
-                    if args.auto_confirm_bm25_rank is not None
-                    else int(app.config.get("AUTO_CONFIRM_V2_MAX_BM25_RANK", 5)),
+        retrieval_workers = max(1, int(args.retrieval_workers))
+        if retrieval_workers > 1 and get_config().experiment.hyde_auto_generate:
+            # HyDE generation commits question_queries rows; keep SQLite to a
+            # single writer.
+            print("HYDE_AUTO_GENERATE is on; running retrieval in the main thread.")
+            retrieval_workers = 1
+        retrieval_pool = (
+            _worker_pool(app, retrieval_workers) if retrieval_workers > 1 else nullcontext()
+        )
+        with retrieval_pool as executor:
+            # map() keeps results in label order either way.
+            if retrieval_workers > 1:
+                retrieve = partial(executor.map, _retrieve_candidates)
+            else:
+                retrieve = partial(map, _retrieve_candidates)
+            result = db.session.execute(
+                labels_stmt, execution_options={"yield_per": _LABEL_BATCH_SIZE}
+            )
+            for labels in result.scalars().partitions():
+                choice_texts = _load_choice_texts({label.question_id for label in labels})
+                batch = []
+                for label in labels:
+                    if label.is_ambiguous and not args.include_ambiguous:
+                        skipped_ambiguous += 1
+                        continue
+                    if not label.gold_lecture_id:
+                        skipped_no_gold += 1
+                        continue
+
+                    question = label.question
+                    if not question:
+                        continue
+
+                    question_text = _build_question_text(question, choice_texts.get(question.id, []))
+                    retrieved = None
+                    if retrieval_cache:
+                        cached = retrieval_cache.get(question.id, question_text, retrieval_hash)
+                        if cached:
+                            retrieved = cached.get("result")
+                    batch.append([label, question, question_text, retrieved])
+
+                misses = [entry for entry in batch if entry[3] is None]
+                fetched = retrieve(
+                    [entry[2] for entry in misses],
+                    [entry[1].id for entry in misses],
+                    repeat(retrieval_mode),
+                    repeat(max_k),
+                    repeat(evidence_per_lecture),
                 )
+                for entry, retrieved in zip(misses, fetched):
+                    entry[3] = retrieved
+                    if retrieval_cache:
+                        retrieval_cache.set(entry[1].id, entry[2], retrieval_hash, retrieved)
+
+                for label, question, question_text, retrieved in batch:
+                    candidates = retrieved["candidates"]
+                    features = retrieved["features"]
+
+                    candidate_ids = [c.get("id") for c in candidates]
+
+                    auto_confirm = False
+                    if app.config.get("AUTO_CONFIRM_V2_ENABLED", True):
+                        auto_confirm = retrieval_features.auto_confirm_v2(
+                            features,
+                            delta=args.auto_confirm_delta
+                            if args.auto_confirm_delta is not None
+                            else float(app.config.get("AUTO_CONFIRM_V2_DELTA", 0.05)),
+                            max_bm25_rank=args.auto_confirm_bm25_rank
+                            if args.auto_confirm_bm25_rank is not None
+                            else int(app.config.get("AUTO_CONFIRM_V2_MAX_BM25_RANK", 5)),
+                        )
 
-            uncertain = retrieval_features.is_uncertain(
-                features,
-                delta_uncertain=args.delta_uncertain
-                if args.delta_uncertain is not None
-                else float(app.config.get("AUTO_CONFIRM_V2_DELTA_UNCERTAIN", 0.03)),
-                min_chunk_len=args.min_chunk_len
-                if args.min_chunk_len is not None
-                else int(app.config.get("AUTO_CONFIRM_V2_MIN_CHUNK_LEN", 200)),
-                auto_confirm=auto_confirm,
-            )
+                    uncertain = retrieval_features.is_uncertain(
+                        features,
+                        delta_uncertain=args.delta_uncertain
+                        if args.delta_uncertain is not None
+                        else float(app.config.get("AUTO_CONFIRM_V2_DELTA_UNCERTAIN", 0.03)),
+                        min_chunk_len=args.min_chunk_len
+                        if args.min_chunk_len is not None
+                        else int(app.config.get("AUTO_CONFIRM_V2_MIN_CHUNK_LEN", 200)),
+                        auto_confirm=auto_confirm,
+                    )
+
+                    items.append(
+                        EvalItem(
+                            label=label,
+                            question=question,
+                            question_text=question_text,
+                            candidates=candidates,
+                            candidate_ids=candidate_ids,
+                            candidate_id_set=set(candidate_ids),
+                            auto_confirm=auto_confirm,
+                            uncertain=uncertain,
+                            auto_confirm_lecture_id=features.get("hybrid_top1_lecture_id"),
+                        )
+                    )
 
-            items.append(
-                {
-                    "label": label,
-                    "question": question,
-                    "question_text": question_text,
-                    "candidates": candidates,
-                    "candidate_ids": candidate_ids,
-                    "rank": rank,
-                    "auto_confirm": auto_confirm,
-                    "uncertain": uncertain,
-                    "auto_confirm_lecture_id": features.get("hybrid_top1_lecture_id"),
-                }
-            )
+        if retrieval_cache:
+            retrieval_cache.save()
 
         if args.only_uncertain:
             filtered = []
             for item in items:
-                if not item["uncertain"]:
+                if not item.uncertain:
                     skipped_only_uncertain += 1
                     continue
                 filtered.append(item)
@@ -320,158 +639,169 @@ def evaluate(db_path: Path, args) -> dict:
             cache = ClassifierResultCache(cache_path)
             config_hash = _classifier_config_hash(app, retrieval_mode, max_k, evidence_per_lecture)
 
+        cached_results = {}
+        if cache and config_hash:
+            cached_results = cache.get_many(
+                (item.question.id for item in items if not item.auto_confirm),
+                config_hash,
+                model_name,
+            )
+
         pending = []
         for item in items:
             if not args.run_classifier:
-                question = item["question"]
-                item["ai_suggested_lecture_id"] = question.ai_suggested_lecture_id
-                item["ai_final_lecture_id"] = question.ai_final_lecture_id or question.lecture_id
-                item["ai_confidence"] = question.ai_confidence or 0.0
-                item["ai_model_name"] = question.ai_model_name or ""
+                question = item.question
+                item.ai_suggested_lecture_id = question.ai_suggested_lecture_id
+                item.ai_final_lecture_id = question.ai_final_lecture_id or question.lecture_id
+                item.ai_confidence = question.ai_confidence or 0.0
+                item.ai_model_name = question.ai_model_name or ""
                 continue
 
-            if item["auto_confirm"]:
-                item["ai_suggested_lecture_id"] = item["auto_confirm_lecture_id"]
-                item["ai_final_lecture_id"] = item["auto_confirm_lecture_id"]
-                item["ai_confidence"] = 1.0
-                item["ai_model_name"] = "auto_confirm_v2"
+            if item.auto_confirm:
+                item.ai_suggested_lecture_id = item.auto_confirm_lecture_id
+                item.ai_final_lecture_id = item.auto_confirm_lecture_id
+                item.ai_confidence = 1.0
+                item.ai_model_name = "auto_confirm_v2"
                 continue
 
-            cached = None
-            if cache and config_hash:
-                cached = cache.get(item["question"].id, config_hash, model_name)
+            cached = cached_results.get(item.question.id)
             if cached:
                 result = cached.get("result") or {}
-                item["ai_suggested_lecture_id"] = result.get("lecture_id")
-                item["ai_final_lecture_id"] = result.get("lecture_id")
-                item["ai_confidence"] = float(result.get("confidence") or 0.0)
-                item["ai_model_name"] = result.get("model_name") or model_name
+                item.ai_suggested_lecture_id = result.get("lecture_id")
+                item.ai_final_lecture_id = result.get("lecture_id")
+                item.ai_confidence = float(result.get("confidence") or 0.0)
+                item.ai_model_name = result.get("model_name") or model_name
                 continue
 
             pending.append(item)
 
         if args.run_classifier and pending:
-            max_workers = max(1, int(args.max_workers))
-            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            max_workers = min(max(1, int(args.max_workers)), len(pending))
+            if args.io_bound:
+                # Network-bound classify calls: allow more threads than
+                # --max-workers when there is enough pending work.
+                max_workers = max(max_workers, min(_IO_BOUND_MAX_WORKERS, len(pending)))
+            with _worker_pool(app, max_workers) as executor:
                 futures = {}
-                for item in pending:
-                    expand_context = bool(app.config.get("PARENT_ENABLED", False)) and item["uncertain"]
-                    candidates = copy.deepcopy(item["candidates"])
-                    futures[
-                        executor.submit(
-                            _classify_worker,
-                            app,
-                            item["question"].id,
-                            candidates,
-                            expand_context,
-                        )
-                    ] = item
-
-                for future in as_completed(futures):
-                    item = futures[future]
-                    try:
-                        question_id, result = future.result()
-                    except Exception as exc:
-                        question_id = item["question"].id
-                        result = {
-                            "lecture_id": None,
-                            "confidence": 0.0,
-                            "reason": f"Error: {exc}",
-                            "study_hint": "",
-                            "evidence": [],
-                            "no_match": True,
-                            "model_name": model_name,
-                        }
-                    item["ai_suggested_lecture_id"] = result.get("lecture_id")
-                    item["ai_final_lecture_id"] = result.get("lecture_id")
-                    item["ai_confidence"] = float(result.get("confidence") or 0.0)
-                    item["ai_model_name"] = result.get("model_name") or model_name
-
-                    if cache and config_hash:
-                        cache.set(question_id, config_hash, model_name, result)
+                try:
+                    # Keep a bounded window of in-flight tasks instead of submitting
+                    # every pending item up front.
+                    max_in_flight = _IN_FLIGHT_PER_WORKER * max_workers
+                    pending_iter = iter(pending)
+                    while True:
+                        for item in islice(pending_iter, max_in_flight - len(futures)):
+                            expand_context = bool(app.config.get("PARENT_ENABLED", False)) and item.uncertain
+                            candidates = item.candidates
+                            if expand_context:
+                                # expand_candidates only sets top-level parent_* keys
+                                # and classify_single only reads, so a per-candidate
+                                # shallow copy keeps item.candidates intact.
+                                candidates = [dict(cand) for cand in candidates]
+                            futures[
+                                executor.submit(
+                                    _classify_worker,
+                                    item.question.id,
+                                    candidates,
+                                    expand_context,
+                                )
+                            ] = item
+                        if not futures:
+                            break
+
+                        done, _ = wait(futures, return_when=FIRST_COMPLETED)
+                        for future in done:
+                            item = futures.pop(future)
+                            try:
+                                question_id, result = future.result()
+                            except Exception as exc:
+                                question_id = item.question.id
+                                result = {
+                                    "lecture_id": None,
+                                    "confidence": 0.0,
+                                    "reason": f"Error: {exc}",
+                                    "study_hint": "",
+                                    "evidence": [],
+                                    "no_match": True,
+                                    "model_name": model_name,
+                                }
+                            item.ai_suggested_lecture_id = result.get("lecture_id")
+                            item.ai_final_lecture_id = result.get("lecture_id")
+                            item.ai_confidence = float(result.get("confidence") or 0.0)
+                            item.ai_model_name = result.get("model_name") or model_name
+
+                            if cache and config_hash:
+                                cache.set(question_id, config_hash, model_name, result)
+                finally:
+                    # Queued tasks are dropped; the pool then waits only for
+                    # running ones before tearing down worker contexts.
+                    for future in futures:
+                        future.cancel()
 
         if cache:
             cache.save()
 
-        for item in items:
-            label = item["label"]
-            candidate_ids = item["candidate_ids"]
-            rank = item["rank"]
-
-            for k in args.top_k:
-                if rank is not None and rank < k:
-                    metrics[f"top{k}"] += 1
-
-            if rank is not None:
-                metrics["mrr_sum"] += 1.0 / (rank + 1)
-
-            pred_value = None
-            if args.pred_field == "ai_final_lecture_id":
-                pred_value = item.get("ai_final_lecture_id")
-                if pred_value is None:
-                    pred_value = item["question"].lecture_id
-            elif args.pred_field == "ai_suggested_lecture_id":
-                pred_value = item.get("ai_suggested_lecture_id")
-            else:
-                pred_value = getattr(item["question"], args.pred_field, None)
+        found, positions = _gold_ranks(items)
+        for k in args.top_k:
+            metrics[f"top{k}"] += int(np.count_nonzero(found & (positions < k)))
+        # Summed in item order (not np.sum's pairwise order) so reports stay
+        # bit-for-bit comparable with earlier runs.
+        metrics["mrr_sum"] += sum((1.0 / (positions[found] + 1)).tolist())
+
+        pred_getter = _make_pred_getter(args.pred_field)
+        for row, item in enumerate(items):
+            label = item.label
+            candidate_id_set = item.candidate_id_set
+            rank = int(positions[row]) if found[row] else None
+
+            pred_value = pred_getter(item)
 
             metrics["final_total"] += 1
             if pred_value == label.gold_lecture_id:
                 metrics["final_correct"] += 1
 
-            raw_pred = item.get("ai_suggested_lecture_id")
-            if raw_pred and raw_pred not in candidate_ids:
+            raw_pred = item.ai_suggested_lecture_id
+            if raw_pred and raw_pred not in candidate_id_set:
                 metrics["out_of_candidate"] += 1
-            if pred_value and pred_value not in candidate_ids:
+            if pred_value and pred_value not in candidate_id_set:
                 metrics["out_of_candidate_final"] += 1
 
-            ai_conf = item.get("ai_confidence") or 0.0
+            ai_conf = item.ai_confidence
             auto_threshold = current_threshold + current_margin
             if (
                 raw_pred
-                and raw_pred in candidate_ids
+                and raw_pred in candidate_id_set
                 and ai_conf >= auto_threshold
             ):
                 auto_current["total"] += 1
                 if raw_pred == label.gold_lecture_id:
                     auto_current["correct"] += 1
 
-            for threshold in thresholds:
-                for margin in margins:
-                    gate = threshold + margin
-                    if (
-                        raw_pred
-                        and raw_pred in candidate_ids
-                        and ai_conf >= gate
-                    ):
-                        auto_sweep[(threshold, margin)]["total"] += 1
-                        if raw_pred == label.gold_lecture_id:
-                            auto_sweep[(threshold, margin)]["correct"] += 1
-
-            if item["auto_confirm"] and item["auto_confirm_lecture_id"]:
+            if item.auto_confirm and item.auto_confirm_lecture_id:
                 auto_v2["total"] += 1
-                if item["auto_confirm_lecture_id"] == label.gold_lecture_id:
+                if item.auto_confirm_lecture_id == label.gold_lecture_id:
                     auto_v2["correct"] += 1
 
             if rank is None and len(misses_top10) < args.max_failures:
                 misses_top10.append(
                     {
-                        "question_id": item["question"].id,
+                        "question_id": item.question.id,
                         "gold_lecture_id": label.gold_lecture_id,
                         "predicted_lecture_id": pred_value,
-                        "top_candidates": _candidate_payload(item["candidates"]),
+                        "top_candidates": _candidate_payload(item.candidates),
                     }
                 )
             if rank is not None and pred_value != label.gold_lecture_id and len(wrong_final) < args.max_failures:
                 wrong_final.append(
                     {
-                        "question_id": item["question"].id,
+                        "question_id": item.question.id,
                         "gold_lecture_id": label.gold_lecture_id,
                         "predicted_lecture_id": pred_value,
-                        "top_candidates": _candidate_payload(item["candidates"]),
+                        "top_candidates": _candidate_payload(item.candidates),
                     }
                 )
 
+        _accumulate_auto_sweep(items, thresholds, margins, auto_sweep)
+
         results = {
             "total": total,
             "skipped_no_gold": skipped_no_gold,
@@ -511,8 +841,24 @@ def main() -> None:
     # Live classification options
     parser.add_argument("--run-classifier", action="store_true", help="Run live classification.")
     parser.add_argument("--max-workers", type=int, default=4, help="Max concurrent classifier workers.")
+    parser.add_argument(
+        "--retrieval-workers",
+        type=int,
+        default=1,
+        help="Concurrent retrieval workers (1 = run retrieval in the main thread).",
+    )
+    parser.add_argument(
+        "--io-bound",
+        action="store_true",
+        help=f"Allow up to {_IO_BOUND_MAX_WORKERS} classifier workers for large runs (network-bound).",
+    )
     parser.add_argument("--no-cache", action="store_true", help="Disable classifier cache.")
     parser.add_argument("--cache-path", default=None, help="Override classifier cache path.")
+    parser.add_argument(
+        "--no-retrieval-cache",
+        action="store_true",
+        help="Recompute retrieval instead of reusing cached results.",
+    )
     parser.add_argument("--only-uncertain", action="store_true", help="Evaluate only uncertain items.")
     parser.add_argument("--limit", type=int, default=None, help="Limit number of eval items.")
 
@@ -16,29 +16,27 @@ import os
 import sqlite3
 import sys
 from pathlib import Path
-from urllib.parse import urlparse
 
 ROOT_DIR = Path(__file__).resolve().parents[1]
 if str(ROOT_DIR) not in sys.path:
     sys.path.append(str(ROOT_DIR))
 
-# Removed: from config import Config (now using config package)
-
-
-def _resolve_db_path(db_arg: str | None) -> str:
-    if db_arg:
-        return db_arg
-
-    from config import Config as _LegacyConfig
-
-    uri = _LegacyConfig.SQLALCHEMY_DATABASE_URI
-    if uri.startswith("sqlite:///"):
-        return uri.replace("sqlite:///", "", 1)
-    if uri.startswith("sqlite://"):
-        return uri.replace("sqlite://", "", 1)
-    parsed = urlparse(uri)
-    return parsed.path
-
+try:
+    from scripts._paths import resolve_db_path
+    from scripts._sqlite import optimize_after_write
+except ModuleNotFoundError:
+    from _paths import resolve_db_path
+    from _sqlite import optimize_after_write
+
+# Bulk-load settings for this connection. WAL keeps synchronous=NORMAL
+# crash-safe, so the sync pays one fsync at COMMIT instead of per write.
+_BULK_PRAGMAS = """
+PRAGMA journal_mode=WAL;
+PRAGMA synchronous=NORMAL;
+PRAGMA temp_store=MEMORY;
+PRAGMA cache_size=-65536;
+PRAGMA mmap_size=1073741824;
+"""
 
 def _table_exists(cursor: sqlite3.Cursor, name: str) -> bool:
     cursor.execute(
@@ -48,13 +46,11 @@ def _table_exists(cursor: sqlite3.Cursor, name: str) -> bool:
     return cursor.fetchone() is not None
 
 
-def init_fts(db_path: str, rebuild: bool, sync: bool, dry_run: bool = False) -> None:
-    db_path = os.path.abspath(db_path)
-    if not os.path.exists(db_path):
-        raise RuntimeError(f"SQLite DB not found: {db_path}")
-
-    conn = sqlite3.connect(db_path)
-    cursor = conn.cursor()
+def _build_fts(cursor: sqlite3.Cursor, rebuild: bool, sync: bool, dry_run: bool) -> None:
+    if rebuild:
+        # Dropping the index is one b-tree free; DELETE would write a
+        # tombstone per row into the FTS segments.
+        cursor.execute("DROP TABLE IF EXISTS lecture_chunks_fts")
 
     cursor.execute(
         """
@@ -68,40 +64,74 @@ def init_fts(db_path: str, rebuild: bool, sync: bool, dry_run: bool = False) ->
         )
         """
     )
+    # Per-term document counts, read by BM25_MAX_DF_RATIO term pruning.
+    cursor.execute(
+        """
+        CREATE VIRTUAL TABLE IF NOT EXISTS lecture_chunks_fts_vocab
+        USING fts5vocab(lecture_chunks_fts, row)
+        """
+    )
 
-    if rebuild:
-        cursor.execute("DELETE FROM lecture_chunks_fts")
-
-    if sync:
-        if not _table_exists(cursor, "lecture_chunks"):
-            print("lecture_chunks table not found; skipping sync.")
-        else:
-            cursor.execute(
-                "SELECT id, lecture_id, page_start, page_end, content FROM lecture_chunks"
-            )
-            rows = cursor.fetchall()
-            if not dry_run:
-                cursor.executemany(
-                    """
-                    INSERT INTO lecture_chunks_fts
-                        (content, chunk_id, lecture_id, page_start, page_end)
-                    VALUES (?, ?, ?, ?, ?)
-                    """,
-                    [
-                        (content, chunk_id, lecture_id, page_start, page_end)
-                        for chunk_id, lecture_id, page_start, page_end, content in rows
-                    ],
-                )
-                print(f"Synchronized {len(rows)} chunks into FTS.")
-            else:
-                print(f"[DRY-RUN] Would synchronize {len(rows)} chunks into FTS.")
+    if not sync:
+        return
+    if not _table_exists(cursor, "lecture_chunks"):
+        print("lecture_chunks table not found; skipping sync.")
+        return
+    if dry_run:
+        cursor.execute("SELECT COUNT(*) FROM lecture_chunks")
+        print(f"[DRY-RUN] Would synchronize {cursor.fetchone()[0]} chunks into FTS.")
+        return
+
+    # A single INSERT ... SELECT keeps the copy inside SQLite instead
+    # of passing every row through Python.
+    cursor.execute(
+        """
+        INSERT INTO lecture_chunks_fts
+            (content, chunk_id, lecture_id, page_start, page_end)
+        SELECT content, id, lecture_id, page_start, page_end
+        FROM lecture_chunks
+        """
+    )
+    print(f"Synchronized {cursor.rowcount} chunks into FTS.")
+    # Merge the incremental b-tree segments left by the bulk insert so
+    # MATCH (and the lecture_id filter after it) walks one postings list.
+    cursor.execute(
+        "INSERT INTO lecture_chunks_fts(lecture_chunks_fts) VALUES ('optimize')"
+    )
+
+
+def init_fts(db_path: str, rebuild: bool, sync: bool, dry_run: bool = False) -> None:
+    db_path = os.path.abspath(db_path)
+    if not os.path.exists(db_path):
+        raise RuntimeError(f"SQLite DB not found: {db_path}")
 
+    # Autocommit mode: the transaction below is the only one, and DDL inside
+    # it cannot trigger an implicit commit.
+    conn = sqlite3.connect(db_path, isolation_level=None)
     if not dry_run:
-        conn.commit()
+        conn.executescript(_BULK_PRAGMAS)
+    cursor = conn.cursor()
+
+    # One write transaction for the rebuild and the reinsert, so a failed
+    # sync leaves the previous index in place.
+    cursor.execute("BEGIN IMMEDIATE")
+    try:
+        _build_fts(cursor, rebuild=rebuild, sync=sync, dry_run=dry_run)
+    except BaseException:
+        cursor.execute("ROLLBACK")
+        conn.close()
+        raise
+
+    if dry_run:
+        cursor.execute("ROLLBACK")
         conn.close()
-        print("FTS init complete.")
-    else:
-        print("[DRY-RUN] Skipping commit and close")
+        print("[DRY-RUN] Rolled back; nothing was written.")
+        return
+
+    cursor.execute("COMMIT")
+    optimize_after_write(conn)
+    conn.close()
+    print("FTS init complete.")
 
 
 def main() -> None:
@@ -128,10 +158,10 @@ def main() -> None:
     )
     args = parser.parse_args()
 
-    print_script_header("init_fts.py", _resolve_db_path(args.db))
+    print_script_header("init_fts.py", str(resolve_db_path(args.db)))
 
     init_fts(
-        _resolve_db_path(args.db),
+        str(resolve_db_path(args.db)),
         rebuild=args.rebuild,
         sync=args.sync or args.rebuild,
         dry_run=args.dry_run,
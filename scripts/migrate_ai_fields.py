@@ -29,32 +29,37 @@ def migrate(db_uri: str | None = None, config_name: str = "default"):
     with app.app_context():
         # Add new columns to questions table
         columns_to_add = [
-            'ALTER TABLE questions ADD COLUMN ai_suggested_lecture_id INTEGER REFERENCES lectures(id)',
-            'ALTER TABLE questions ADD COLUMN ai_suggested_lecture_title_snapshot VARCHAR(300)',
-            'ALTER TABLE questions ADD COLUMN ai_confidence FLOAT',
-            'ALTER TABLE questions ADD COLUMN ai_reason TEXT',
-            'ALTER TABLE questions ADD COLUMN ai_model_name VARCHAR(100)',
-            'ALTER TABLE questions ADD COLUMN ai_classified_at DATETIME',
-            'ALTER TABLE questions ADD COLUMN classification_status VARCHAR(20) DEFAULT "manual"',
+            ('ai_suggested_lecture_id', 'INTEGER REFERENCES lectures(id)'),
+            ('ai_suggested_lecture_title_snapshot', 'VARCHAR(300)'),
+            ('ai_confidence', 'FLOAT'),
+            ('ai_reason', 'TEXT'),
+            ('ai_model_name', 'VARCHAR(100)'),
+            ('ai_classified_at', 'DATETIME'),
+            ('classification_status', 'VARCHAR(20) DEFAULT "manual"'),
         ]
-        
-        for col_sql in columns_to_add:
-            try:
-                db.session.execute(text(col_sql))
-                col_name = col_sql.split('ADD COLUMN ')[1].split()[0]
-                print(f'Added: {col_name}')
-            except Exception as e:
-                col_name = col_sql.split('ADD COLUMN ')[1].split()[0]
-                if 'duplicate column' in str(e).lower():
+
+        with db.engine.connect() as conn:
+            existing = {
+                row[1] for row in conn.exec_driver_sql('PRAGMA table_info(questions)')
+            }
+            # No questions table yet: create_all below builds it with every column.
+            missing = [col for col in columns_to_add if existing and col[0] not in existing]
+            for col_name, _ in columns_to_add:
+                if col_name in existing:
                     print(f'Already exists: {col_name}')
-                else:
-                    print(f'Skipped {col_name}: {e}')
-        
+            if missing:
+                # pysqlite does not open a transaction for DDL by itself; one
+                # explicit BEGIN makes all ALTERs commit (or roll back) together.
+                conn.exec_driver_sql('BEGIN')
+                for col_name, col_type in missing:
+                    conn.exec_driver_sql(f'ALTER TABLE questions ADD COLUMN {col_name} {col_type}')
+                conn.commit()
+                for col_name, _ in missing:
+                    print(f'Added: {col_name}')
+
         # Create classification_jobs table if not exists
         db.create_all()
         print('Created classification_jobs table if not exists')
-        
-        db.session.commit()
         print('Schema migration complete!')
 
 if __name__ == '__main__':
@@ -11,7 +11,6 @@ import hashlib
 import sys
 from datetime import datetime
 from pathlib import Path
-from urllib.parse import urlparse
 
 import sqlite3
 
@@ -20,20 +19,12 @@ if str(ROOT_DIR) not in sys.path:
     sys.path.append(str(ROOT_DIR))
 MIGRATIONS_DIR = ROOT_DIR / "migrations"
 
-
-def _resolve_db_path(db_arg: str | None) -> Path:
-    if db_arg:
-        return Path(db_arg)
-
-    from config import Config
-
-    uri = Config.SQLALCHEMY_DATABASE_URI
-    if uri.startswith("sqlite:///"):
-        return Path(uri.replace("sqlite:///", "", 1))
-    if uri.startswith("sqlite://"):
-        return Path(uri.replace("sqlite://", "", 1))
-    parsed = urlparse(uri)
-    return Path(parsed.path)
+try:
+    from scripts._paths import resolve_db_path
+    from scripts._sqlite import optimize_after_write
+except ModuleNotFoundError:
+    from _paths import resolve_db_path
+    from _sqlite import optimize_after_write
 
 
 def _checksum(text: str) -> str:
@@ -50,7 +41,6 @@ def _ensure_schema_migrations(conn: sqlite3.Connection) -> None:
         )
         """
     )
-    conn.commit()
 
 
 def _load_migrations() -> list[Path]:
@@ -59,10 +49,6 @@ def _load_migrations() -> list[Path]:
     return sorted(p for p in MIGRATIONS_DIR.glob("*.sql") if p.is_file())
 
 
-def _sql_literal(value: str) -> str:
-    return value.replace("'", "''")
-
-
 def _fetch_applied(conn: sqlite3.Connection) -> dict[str, str]:
     rows = conn.execute(
         "SELECT version, checksum FROM schema_migrations"
@@ -71,21 +57,22 @@ def _fetch_applied(conn: sqlite3.Connection) -> dict[str, str]:
 
 
 def _apply_migration(
-    conn: sqlite3.Connection, version: str, sql_text: str, checksum: str
+    conn: sqlite3.Connection, version: str, sql_text: str, checksum: str, applied_at: str
 ) -> None:
-    applied_at = datetime.utcnow().isoformat(timespec="seconds")
-    script = "\n".join(
-        [
-            "BEGIN;",
-            sql_text.rstrip().rstrip(";") + ";",
-            (
-                "INSERT INTO schema_migrations (version, checksum, applied_at) "
-                f"VALUES ('{_sql_literal(version)}', '{checksum}', '{applied_at}');"
-            ),
-            "COMMIT;",
-        ]
-    )
-    conn.executescript(script)
+    # executescript() commits any open transaction before it runs, so BEGIN
+    # has to be part of the script; it leaves the transaction open for the
+    # bookkeeping INSERT below.
+    try:
+        conn.executescript("BEGIN;\n" + sql_text.rstrip().rstrip(";") + ";")
+        conn.execute(
+            "INSERT INTO schema_migrations (version, checksum, applied_at) VALUES (?, ?, ?)",
+            (version, checksum, applied_at),
+        )
+        conn.execute("COMMIT")
+    except BaseException:
+        if conn.in_transaction:
+            conn.execute("ROLLBACK")
+        raise
 
 
 def run_migrations(db_path: Path) -> int:
@@ -98,9 +85,13 @@ def run_migrations(db_path: Path) -> int:
         return 0
 
     applied_count = 0
-    with sqlite3.connect(db_path.as_posix()) as conn:
+    # Autocommit mode: transactions are opened and closed explicitly.
+    with sqlite3.connect(db_path.as_posix(), isolation_level=None) as conn:
+        conn.executescript("PRAGMA journal_mode=WAL; PRAGMA synchronous=NORMAL;")
         _ensure_schema_migrations(conn)
         applied = _fetch_applied(conn)
+        # One timestamp for every migration applied in this run.
+        applied_at = datetime.utcnow().isoformat(timespec="seconds")
 
         for path in migrations:
             version = path.name
@@ -116,13 +107,16 @@ def run_migrations(db_path: Path) -> int:
                 continue
 
             try:
-                _apply_migration(conn, version, sql_text, checksum)
+                _apply_migration(conn, version, sql_text, checksum, applied_at)
             except Exception as exc:
                 raise RuntimeError(f"Migration failed: {version}") from exc
 
             applied_count += 1
             print(f"Applied: {version}")
 
+        if applied_count:
+            optimize_after_write(conn)
+
     return applied_count
 
 
@@ -131,7 +125,7 @@ def main() -> None:
     parser.add_argument("--db", help="Path to sqlite db file.")
     args = parser.parse_args()
 
-    db_path = _resolve_db_path(args.db)
+    db_path = resolve_db_path(args.db)
     count = run_migrations(db_path)
     print(f"Applied {count} migrations.")
 
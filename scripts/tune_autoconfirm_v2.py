@@ -8,6 +8,10 @@ from __future__ import annotations
 
 import argparse
 import sys
+import threading
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
 from datetime import datetime
 from pathlib import Path
 
@@ -15,13 +19,19 @@ ROOT_DIR = Path(__file__).resolve().parents[1]
 if str(ROOT_DIR) not in sys.path:
     sys.path.append(str(ROOT_DIR))
 
+import numpy as np
 from dotenv import load_dotenv
+from sqlalchemy.orm import contains_eager
 
 load_dotenv(ROOT_DIR / ".env")
 
 from app import create_app
-from app.models import EvaluationLabel, Question
+from app.models import Choice, EvaluationLabel, Question
 from app.services import retrieval_features
+from config import get_config
+
+# Per-thread state (the app) for the retrieval worker pool.
+_worker_state = threading.local()
 
 
 def _parse_grid(raw: str) -> list[float]:
@@ -85,14 +95,79 @@ def _parse_int_grid(raw: str) -> list[int]:
     return values
 
 
-def _build_question_text(question: Question) -> str:
-    choices = [c.content for c in question.choices.order_by("choice_number").all()]
+def _load_choice_texts(question_ids: set[int]) -> dict[int, list[str]]:
+    """Fetch choice contents for all questions in one query, in choice_number order."""
+    choices: dict[int, list[str]] = defaultdict(list)
+    if not question_ids:
+        return choices
+    rows = (
+        Choice.query.with_entities(Choice.question_id, Choice.content)
+        .filter(Choice.question_id.in_(question_ids))
+        .order_by(Choice.question_id, Choice.choice_number, Choice.id)
+        .all()
+    )
+    for question_id, content in rows:
+        choices[question_id].append(content)
+    return choices
+
+
+def _build_question_text(question: Question, choices: list[str]) -> str:
     question_text = question.content or ""
     if choices:
         question_text = f"{question_text}\n" + " ".join(choices)
     return question_text.strip()
 
 
+def _init_worker(app) -> None:
+    _worker_state.app = app
+
+
+def _build_features_worker(question_text: str, question_id: int) -> dict:
+    # Each task gets its own app context; popping it removes the thread's
+    # scoped session, so nothing is left open when the pool shuts down.
+    with _worker_state.app.app_context():
+        return _build_features(question_text, question_id)
+
+
+def _build_features(question_text: str, question_id: int) -> dict:
+    # Runs in a pool thread: only plain values cross over, never ORM objects.
+    artifacts = retrieval_features.build_retrieval_artifacts(
+        question_text,
+        question_id,
+        top_n=80,
+        top_k=5,
+    )
+    return artifacts.features
+
+
+def _auto_confirm_arrays(items: list[dict]) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Pull the fields auto_confirm_v2 gates on into arrays, one row per item.
+
+    Items that fail the grid-independent checks (no top-1, or BM25 and hybrid
+    top-1 disagree) get margin NaN, so no delta admits them. A missing BM25
+    rank becomes +inf for the same reason.
+    """
+    n = len(items)
+    margin = np.full(n, np.nan, dtype=np.float64)
+    bm25_rank = np.full(n, np.inf, dtype=np.float64)
+    correct = np.zeros(n, dtype=bool)
+    for row, item in enumerate(items):
+        features = item["features"]
+        if not features:
+            continue
+        bm25_top1 = features.get("bm25_top1_chunk_id")
+        if not bm25_top1 or bm25_top1 != features.get("hybrid_top1_chunk_id"):
+            continue
+        embed_margin = features.get("embed_margin")
+        if embed_margin is not None:
+            margin[row] = float(embed_margin)
+        hybrid_bm25_rank = features.get("hybrid_top1_bm25_rank")
+        if hybrid_bm25_rank is not None:
+            bm25_rank[row] = int(hybrid_bm25_rank)
+        correct[row] = features.get("hybrid_top1_lecture_id") == item["gold_lecture_id"]
+    return margin, bm25_rank, correct
+
+
 def main() -> None:
     parser = argparse.ArgumentParser(description="Tune auto-confirm v2 thresholds.")
     parser.add_argument("--db", default="data/dev.db", help="SQLite db path.")
@@ -105,6 +180,12 @@ def main() -> None:
     )
     parser.add_argument("--out", default="reports/autoconfirm_v2_tuning.md", help="Markdown output path.")
     parser.add_argument("--include-ambiguous", action="store_true", help="Include ambiguous labels.")
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Concurrent retrieval workers (1 = run retrieval in the main thread).",
+    )
     args = parser.parse_args()
 
     db_path = Path(args.db)
@@ -121,8 +202,16 @@ def main() -> None:
     rows = []
     total_eval = 0
     with app.app_context():
-        labels = EvaluationLabel.query.join(Question).order_by(EvaluationLabel.id.asc()).all()
-        items = []
+        labels = (
+            EvaluationLabel.query.join(Question)
+            .options(contains_eager(EvaluationLabel.question))
+            .order_by(EvaluationLabel.id.asc())
+            .all()
+        )
+        choice_texts = _load_choice_texts({label.question_id for label in labels})
+        gold_ids = []
+        question_texts = []
+        question_ids = []
         for label in labels:
             if label.is_ambiguous and not args.include_ambiguous:
                 continue
@@ -131,37 +220,51 @@ def main() -> None:
             question = label.question
             if not question:
                 continue
-            question_text = _build_question_text(question)
-            artifacts = retrieval_features.build_retrieval_artifacts(
-                question_text,
-                question.id,
-                top_n=80,
-                top_k=5,
-            )
-            items.append(
-                {
-                    "gold_lecture_id": label.gold_lecture_id,
-                    "features": artifacts.features,
-                }
+            gold_ids.append(label.gold_lecture_id)
+            question_texts.append(_build_question_text(question, choice_texts.get(question.id, [])))
+            question_ids.append(question.id)
+
+        workers = max(1, int(args.workers))
+        if workers > 1 and get_config().experiment.hyde_auto_generate:
+            # HyDE generation commits question_queries rows; keep SQLite to a
+            # single writer.
+            print("HYDE_AUTO_GENERATE is on; running retrieval in the main thread.")
+            workers = 1
+        pool = (
+            ThreadPoolExecutor(
+                max_workers=workers,
+                initializer=_init_worker,
+                initargs=(app,),
             )
+            if workers > 1
+            else nullcontext()
+        )
+        with pool:
+            # map() keeps features in label order either way.
+            if workers > 1:
+                features_list = pool.map(_build_features_worker, question_texts, question_ids)
+            else:
+                features_list = map(_build_features, question_texts, question_ids)
+            items = [
+                {"gold_lecture_id": gold_lecture_id, "features": features}
+                for gold_lecture_id, features in zip(gold_ids, features_list)
+            ]
 
         total_eval = len(items)
-        for delta in deltas:
-            for max_rank in ranks:
-                auto_total = 0
-                auto_correct = 0
-                for item in items:
-                    features = item["features"]
-                    auto = retrieval_features.auto_confirm_v2(
-                        features, delta=delta, max_bm25_rank=max_rank
-                    )
-                    if not auto:
-                        continue
-                    auto_total += 1
-                    if features.get("hybrid_top1_lecture_id") == item["gold_lecture_id"]:
-                        auto_correct += 1
+        margin, bm25_rank, correct = _auto_confirm_arrays(items)
+        # (item, delta, max_rank) gate in one broadcast, mirroring
+        # retrieval_features.auto_confirm_v2.
+        auto = (margin[:, None, None] >= np.asarray(deltas, dtype=np.float64)[None, :, None]) & (
+            bm25_rank[:, None, None] <= np.asarray(ranks, dtype=np.float64)[None, None, :]
+        )
+        auto_totals = auto.sum(axis=0)
+        auto_corrects = (auto & correct[:, None, None]).sum(axis=0)
+        for i, delta in enumerate(deltas):
+            for j, max_rank in enumerate(ranks):
+                auto_total = int(auto_totals[i, j])
+                auto_correct = int(auto_corrects[i, j])
                 precision = auto_correct / auto_total if auto_total else 0.0
-                coverage = auto_total / total if total else 0.0
+                coverage = auto_total / total_eval if total_eval else 0.0
                 rows.append(
                     {
                         "delta": delta,
@@ -8,6 +8,7 @@ Usage:
   python scripts/verify_repo.py                    # Basic compileall check
   python scripts/verify_repo.py --db data/dev.db    # Include DB migrations/FTS check
   python scripts/verify_repo.py --all               # All checks (compileall + DB)
+  python scripts/verify_repo.py --force             # Recompile even up-to-date files
 
 Exit codes:
   0 - All checks passed
@@ -26,8 +27,8 @@ if str(ROOT_DIR) not in sys.path:
     sys.path.append(str(ROOT_DIR))
 
 
-def _compile_check() -> bool:
-    """Run compileall on Python source files."""
+def _compile_check(force: bool = False) -> bool:
+    """Run compileall on Python source files (fresh .pyc files are skipped unless force)."""
     print("Running compileall check...")
     targets = [
         ROOT_DIR / "app",
@@ -43,8 +44,9 @@ def _compile_check() -> bool:
 
         result = compileall.compile_dir(
             target,
-            force=True,
+            force=force,
             quiet=1,
+            workers=0,
         )
         if not result:
             print(f"  [FAIL] Compilation failed for {target}")
@@ -102,6 +104,11 @@ def main() -> int:
         action="store_true",
         help="Run all checks including DB (uses data/dev.db if --db not specified)",
     )
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="Recompile every file even if its .pyc is up to date.",
+    )
 
     args = parser.parse_args()
 
@@ -110,7 +117,7 @@ def main() -> int:
     print("=" * 60)
 
     # Always run compileall
-    if not _compile_check():
+    if not _compile_check(force=args.force):
         print("\n[FAIL] Compile check failed")
         return 1
 
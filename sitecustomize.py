@@ -2,10 +2,25 @@ from __future__ import annotations
 
 import os
 import sys
-from pathlib import Path
+
+
+def _norm(path: str) -> str:
+    return os.path.normcase(os.path.normpath(path))
+
+
+def _activated_project_venv() -> bool:
+    # Fast path: string checks only, no filesystem access. The venv
+    # activate scripts export VIRTUAL_ENV.
+    venv = os.environ.get("VIRTUAL_ENV")
+    if not venv:
+        return False
+    expected = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".venv")
+    return _norm(venv) == _norm(expected) == _norm(sys.prefix)
 
 
 def _using_project_venv() -> bool:
+    from pathlib import Path
+
     repo_root = Path(__file__).resolve().parent
     expected = (repo_root / ".venv").resolve()
     try:
@@ -20,7 +35,7 @@ def _skip_check() -> bool:
     return bool(value) and value.lower() in ("1", "true", "yes", "on")
 
 
-if not _using_project_venv() and not _skip_check():
+if not _skip_check() and not _activated_project_venv() and not _using_project_venv():
     sys.stderr.write(
         "This project requires the local .venv.\n"
         "Activate it with: .venv\\Scripts\\activate\n"